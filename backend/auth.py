@@ -3,12 +3,16 @@ from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials, APIKeyHeader
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import os
+import uuid
 from dotenv import load_dotenv
 
-from database import get_db
+import database
+from database import get_db, get_async_db
 import models
 
 load_dotenv()
@@ -16,9 +20,20 @@ load_dotenv()
 SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 ALGORITHM = os.getenv("JWT_ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", 10080))
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+admin_key_header = APIKeyHeader(name="X-Admin-Key", auto_error=False)
+
+def normalize_email(email: str) -> str:
+    """Canonical form stored for new accounts and used for every email lookup."""
+    return email.strip().lower()
+
+def email_matches(email: str):
+    # lower() on the column also matches accounts stored before emails were normalized
+    return func.lower(models.User.email) == normalize_email(email)
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -43,7 +58,7 @@ def decode_token(token: str):
     except JWTError:
         return None
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+def _user_id_from_credentials(credentials: HTTPAuthorizationCredentials) -> str:
     token = credentials.credentials
     payload = decode_token(token)
     
@@ -62,7 +77,9 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    return user_id
+
+def _ensure_user(user):
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -71,3 +88,50 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
         )
     
     return user
+
+def _user_uuid(credentials: HTTPAuthorizationCredentials) -> uuid.UUID:
+    try:
+        return uuid.UUID(_user_id_from_credentials(credentials))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+    user_id = _user_uuid(credentials)
+    user = db.query(models.User).filter(models.User.id == user_id).first()
+    db.info["user_key"] = str(user_id)
+    return _ensure_user(user)
+
+async def get_current_user_async(credentials: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_async_db)):
+    user_id = _user_uuid(credentials)
+    result = await db.execute(select(models.User).where(models.User.id == user_id))
+    db.info["user_key"] = str(user_id)
+    return _ensure_user(result.scalars().first())
+
+def get_optional_user_id(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)) -> Optional[uuid.UUID]:
+    # Token only, no user lookup: for endpoints that serve anonymous clients too
+    if credentials is None:
+        return None
+    try:
+        return _user_uuid(credentials)
+    except HTTPException:
+        return None
+
+def get_user_read_db(current_user: models.User = Depends(get_current_user)):
+    # Read-only session honouring the user's read-your-writes window
+    yield from database.read_session(str(current_user.id))
+
+async def get_user_async_read_db(current_user: models.User = Depends(get_current_user_async)):
+    async for db in database.async_read_session(str(current_user.id)):
+        yield db
+
+def require_admin(api_key: Optional[str] = Depends(admin_key_header)):
+    # Admin endpoints are disabled unless ADMIN_API_KEY is configured
+    if not ADMIN_API_KEY or api_key != ADMIN_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
@@ -0,0 +1,190 @@
+"""Product Catalog Cache
+Process-local, pre-serialized catalog snapshot invalidated through a version number
+"""
+
+import base64
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import orjson
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+import models
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# How often each worker checks the catalog version (one primary-key lookup)
+CATALOG_POLL_SECONDS = float(os.getenv("CATALOG_POLL_SECONDS", 5))
+# Longest wait between refresh attempts while the database is failing (the stale snapshot is served meanwhile)
+CATALOG_MAX_BACKOFF_SECONDS = float(os.getenv("CATALOG_MAX_BACKOFF_SECONDS", 60))
+
+# Columns exposed by the product endpoints (match schemas.ProductResponse)
+PRODUCT_COLUMNS = (
+    models.Product.id,
+    models.Product.name,
+    models.Product.description,
+    models.Product.short_description,
+    models.Product.image_url,
+    models.Product.price,
+    models.Product.category,
+    models.Product.partner_url,
+    (func.coalesce(models.Product.is_vetted, 0) != 0).label("is_vetted"),
+)
+
+
+class CatalogSnapshot:
+    """Immutable catalog at one version, with indexes and pre-serialized JSON."""
+
+    def __init__(self, version: int, products: List[Dict]):
+        self.version = version
+        self.products = products
+        self.by_id = {str(product['id']): product for product in products}
+        self.position = {product_id: index for index, product_id in enumerate(self.by_id)}
+        self.by_category: Dict[str, List[Dict]] = {}
+        for product in products:
+            self.by_category.setdefault(product['category'], []).append(product)
+
+        self.etag = f'"catalog-{version}"'
+        self.products_json = orjson.dumps(products)
+        self.category_json = {category: orjson.dumps(items) for category, items in self.by_category.items()}
+        self.product_json = {product_id: orjson.dumps(product) for product_id, product in self.by_id.items()}
+
+    def page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        vetted: Optional[bool] = None,
+    ) -> Dict:
+        """
+        One filtered page plus per-category facet counts, computed in a single pass.
+
+        Facet counts apply every filter except the category itself, so the category
+        tabs can show how many products each would contain.
+
+        Raises:
+            ValueError: If the cursor is malformed or points at a removed product
+        """
+        after = -1
+        if cursor:
+            try:
+                after = self.position[base64.urlsafe_b64decode(cursor.encode()).decode()]
+            except (ValueError, KeyError):
+                raise ValueError("Invalid or expired cursor")
+
+        items: List[Dict] = []
+        facets: Dict[str, int] = {}
+        total = 0
+        for index, product in enumerate(self.products):
+            if min_price is not None and product['price'] < min_price:
+                continue
+            if max_price is not None and product['price'] > max_price:
+                continue
+            if vetted is not None and product['is_vetted'] != vetted:
+                continue
+            facets[product['category']] = facets.get(product['category'], 0) + 1
+            if category is not None and product['category'] != category:
+                continue
+            total += 1
+            # Collect one extra item to know whether another page exists
+            if index > after and len(items) <= limit:
+                items.append(product)
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = base64.urlsafe_b64encode(str(items[-1]['id']).encode()).decode()
+
+        return {'items': items, 'next_cursor': next_cursor, 'total': total, 'facets': facets}
+
+
+class CatalogCache:
+    """
+    Serves the catalog from memory. The version row is polled at most every
+    CATALOG_POLL_SECONDS, and products are reloaded only when it changes.
+    If a refresh fails, the last snapshot keeps being served and retries back off.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self._session_factory = session_factory
+        self._lock = threading.Lock()
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._next_check_at = 0.0
+        self._failures = 0
+        self._listeners: List[Callable[[CatalogSnapshot], None]] = []
+
+    def on_rebuild(self, listener: Callable[[CatalogSnapshot], None]):
+        """Call `listener(snapshot)` whenever a new catalog version is loaded."""
+        self._listeners.append(listener)
+
+    def get(self) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() < self._next_check_at:
+            return snapshot
+
+        with self._lock:
+            # Another thread may have refreshed while we waited
+            if self._snapshot is not None and time.monotonic() < self._next_check_at:
+                return self._snapshot
+            self._refresh()
+            return self._snapshot
+
+    def _refresh(self):
+        """
+        Raises:
+            Exception: The database error, only if there is no snapshot yet to fall back to
+        """
+        try:
+            snapshot = self._load()
+        except Exception as e:
+            if self._snapshot is None:
+                raise
+            self._failures += 1
+            backoff = min(CATALOG_POLL_SECONDS * 2 ** self._failures, CATALOG_MAX_BACKOFF_SECONDS)
+            self._next_check_at = time.monotonic() + backoff
+            logger.error(f"Catalog refresh failed, serving version {self._snapshot.version} for {backoff:.0f}s: {e}")
+            return
+
+        self._failures = 0
+        self._next_check_at = time.monotonic() + CATALOG_POLL_SECONDS
+        if snapshot is not None:
+            self._snapshot = snapshot
+            for listener in self._listeners:
+                listener(snapshot)
+
+    def _load(self) -> Optional[CatalogSnapshot]:
+        """A snapshot of the current catalog version, or None if ours is still current."""
+        db = self._session_factory()
+        try:
+            version = db.execute(select(models.CatalogVersion.version)).scalar() or 0
+            if self._snapshot is not None and version == self._snapshot.version:
+                return None
+            rows = db.execute(
+                select(*PRODUCT_COLUMNS)
+                .where(models.Product.deleted_at.is_(None))
+                .order_by(models.Product.created_at.desc())
+            ).all()
+            return CatalogSnapshot(version, [dict(row._mapping) for row in rows])
+        finally:
+            db.close()
+
+
+def bump_catalog_version(db: Session):
+    """Invalidate every worker's catalog snapshot; call in the transaction that changes products."""
+    updated = db.execute(
+        update(models.CatalogVersion)
+        .where(models.CatalogVersion.id == 1)
+        .values(version=models.CatalogVersion.version + 1)
+    )
+    if updated.rowcount == 0:
+        db.add(models.CatalogVersion(id=1, version=1))
+
+
+catalog = CatalogCache()
@@ -0,0 +1,158 @@
+"""Catalog Import Pipeline
+Streams a partner product feed (CSV / JSON Lines / JSON) and upserts it on the stable SKU
+"""
+
+import csv
+import io
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List
+
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+import models
+from catalog_cache import bump_catalog_version
+
+CHUNK_SIZE = int(os.getenv("CATALOG_IMPORT_CHUNK_SIZE", 1000))
+
+REQUIRED_FIELDS = ('sku', 'name', 'category', 'price', 'partner_url')
+UPDATABLE_FIELDS = ('name', 'short_description', 'description', 'category', 'price', 'image_url', 'partner_url', 'is_vetted')
+
+
+def iter_feed(path: str) -> Iterator[Dict]:
+    """
+    Yield raw feed rows one at a time.
+
+    CSV and JSON Lines (.jsonl) are streamed; a .json file must hold a single array
+    and is parsed whole.
+    """
+    lower = path.lower()
+    with io.open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if lower.endswith(".csv"):
+            yield from csv.DictReader(f)
+        elif lower.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        elif lower.endswith(".json"):
+            yield from json.load(f)
+        else:
+            raise ValueError(f"Unsupported feed format: {path} (expected .csv, .jsonl or .json)")
+
+
+def normalize_row(row: Dict) -> Dict:
+    """
+    Validate and coerce one feed row into Product column values.
+
+    Raises:
+        ValueError: If a required field is missing or a value cannot be coerced
+    """
+    missing = [field for field in REQUIRED_FIELDS if row.get(field) in (None, "")]
+    if missing:
+        raise ValueError(f"Feed row {row.get('sku', '?')} missing fields: {', '.join(missing)}")
+
+    # Only an explicit partner flag marks a product vetted
+    is_vetted = row.get('is_vetted', 0)
+    if isinstance(is_vetted, str):
+        is_vetted = is_vetted.strip().lower() in ('1', 'true', 'yes')
+
+    return {
+        'sku': str(row['sku']).strip(),
+        'name': row['name'],
+        'short_description': row.get('short_description') or None,
+        'description': row.get('description') or None,
+        'category': str(row['category']).strip().lower(),
+        'price': float(row['price']),
+        'image_url': row.get('image_url') or None,
+        'partner_url': row['partner_url'],
+        'is_vetted': int(bool(is_vetted)),
+    }
+
+
+def _chunks(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    chunk: Dict[str, Dict] = {}
+    for row in rows:
+        # A SKU repeated within one statement would make ON CONFLICT update a row twice
+        chunk[row['sku']] = row
+        if len(chunk) >= size:
+            yield list(chunk.values())
+            chunk = {}
+    if chunk:
+        yield list(chunk.values())
+
+
+def import_catalog(db: Session, rows: Iterable[Dict], soft_delete_missing: bool = True) -> Dict:
+    """
+    Upsert feed rows on SKU with multi-row INSERT ... ON CONFLICT DO UPDATE.
+
+    Existing products keep their id (and so cached recommendation ids stay valid).
+    Products absent from the feed are soft-deleted; reappearing ones are restored.
+    The whole import is one transaction and bumps the catalog version once.
+
+    Returns:
+        Summary with row counts and throughput
+    """
+    started = time.perf_counter()
+    run_at = datetime.utcnow()
+    upserted = 0
+
+    for chunk in _chunks((normalize_row(row) for row in rows), CHUNK_SIZE):
+        for row in chunk:
+            row['updated_at'] = run_at
+        stmt = insert(models.Product).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.Product.sku],
+            set_={
+                **{field: stmt.excluded[field] for field in UPDATABLE_FIELDS},
+                'updated_at': run_at,
+                'deleted_at': None,
+            },
+        )
+        db.execute(stmt)
+        upserted += len(chunk)
+
+    deleted = 0
+    if soft_delete_missing:
+        # Every product in the feed was stamped with run_at above
+        deleted = db.execute(
+            update(models.Product)
+            .where(models.Product.deleted_at.is_(None), models.Product.updated_at < run_at)
+            .values(deleted_at=run_at)
+        ).rowcount
+
+    bump_catalog_version(db)
+    db.commit()
+
+    elapsed = time.perf_counter() - started
+    return {
+        'upserted': upserted,
+        'soft_deleted': deleted,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(upserted / elapsed, 1) if elapsed else None,
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    from database import SessionLocal
+
+    if len(sys.argv) < 2:
+        print("Usage: python catalog_import.py <feed.csv|feed.jsonl|feed.json> [--keep-missing]")
+        sys.exit(1)
+
+    session = SessionLocal()
+    try:
+        summary = import_catalog(session, iter_feed(sys.argv[1]), soft_delete_missing="--keep-missing" not in sys.argv)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+    print(f"✅ Imported {summary['upserted']} products ({summary['soft_deleted']} soft-deleted) "
+          f"in {summary['seconds']}s — {summary['rows_per_second']} rows/s")
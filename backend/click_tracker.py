@@ -0,0 +1,112 @@
+"""Affiliate Click Tracking
+Click-throughs are buffered in memory and flushed to product_clicks in batches
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+import models
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+CLICK_BUFFER_SIZE = int(os.getenv("CLICK_BUFFER_SIZE", 100000))
+CLICK_FLUSH_SECONDS = float(os.getenv("CLICK_FLUSH_SECONDS", 2))
+
+
+class ClickTracker:
+    """
+    Ring buffer of this process's pending click events.
+    Recording a click never touches the database; a background task flushes.
+    """
+
+    def __init__(self, capacity: int = CLICK_BUFFER_SIZE):
+        self._buffer = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.flushed = 0
+        self.dropped = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, product_id: str, user_id: Optional[uuid.UUID] = None):
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                # Oldest unflushed click is overwritten (DB down for a long time)
+                self.dropped += 1
+            self._buffer.append({'product_id': product_id, 'user_id': user_id, 'clicked_at': datetime.utcnow()})
+
+    def _drain(self) -> List[Dict]:
+        with self._lock:
+            events = list(self._buffer)
+            self._buffer.clear()
+        return events
+
+    def flush(self) -> int:
+        """Write all pending clicks in one multi-row insert; re-queue them on failure."""
+        events = self._drain()
+        if not events:
+            return 0
+
+        db = SessionLocal()
+        try:
+            db.execute(insert(models.ProductClick), events)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Click flush failed, re-queueing {len(events)} events: {e}")
+            with self._lock:
+                # Keep newer events if the buffer filled up meanwhile
+                room = self._buffer.maxlen - len(self._buffer)
+                self.dropped += max(0, len(events) - room)
+                self._buffer.extendleft(reversed(events[-room:] if room else []))
+            return 0
+        finally:
+            db.close()
+
+        self.flushed += len(events)
+        return len(events)
+
+    def stats(self) -> Dict:
+        """Buffer status of this process (each worker has its own)."""
+        with self._lock:
+            pending = len(self._buffer)
+        return {'pending': pending, 'flushed': self.flushed, 'dropped': self.dropped}
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(CLICK_FLUSH_SECONDS)
+            await asyncio.to_thread(self.flush)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Final flush so clicks aren't lost on shutdown
+        await asyncio.to_thread(self.flush)
+
+
+def clicks_by_product(db: Session) -> Dict[str, int]:
+    """Flushed clicks per product, across all workers."""
+    rows = db.execute(
+        select(models.ProductClick.product_id, func.count()).group_by(models.ProductClick.product_id)
+    ).all()
+    return {str(product_id): count for product_id, count in rows}
+
+
+click_tracker = ClickTracker()
@@ -1,16 +1,244 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+import hashlib
+import hmac
+import itertools
+import logging
+import math
 import os
+import threading
+import time
+from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Optional comma-separated read replicas for read-only endpoints
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", 10))
+# After a user writes, their reads stay on the primary for this long (replication lag)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", 5))
+# The last write travels with the client (signed cookie, or header for non-browser clients),
+# so every worker process honours it
+READ_YOUR_WRITES_COOKIE = "last_write"
+READ_YOUR_WRITES_HEADER = "X-Last-Write"
+READ_YOUR_WRITES_SECRET = (os.getenv("READ_YOUR_WRITES_SECRET") or os.getenv("JWT_SECRET_KEY") or "").encode()
+
+def _async_url(url):
+    """Map a sync database URL onto its async driver."""
+    url = make_url(url)
+    if url.drivername.startswith("sqlite"):
+        return url.set(drivername="sqlite+aiosqlite")
+    return url.set(drivername="postgresql+asyncpg")
+
+# Async driver URL for hot endpoints; derived from DATABASE_URL unless set explicitly
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+
+# Connection pool settings (size the pool against the number of uvicorn workers:
+# each worker process holds its own pool of DB_POOL_SIZE + DB_MAX_OVERFLOW connections)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+
+class _PoolStatsMixin:
+    """Records checkout wait times and checkout failures on a queue pool."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.checkout_failures += 1
+            raise
+        # Only successful checkouts count towards the wait averages
+        waited = time.perf_counter() - started
+        with self._stats_lock:
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        return connection
+
+    def recreate(self):
+        # Keep counters across pool recreation (e.g. after engine.dispose())
+        pool = super().recreate()
+        pool.checkouts = self.checkouts
+        pool.checkout_failures = self.checkout_failures
+        pool.wait_seconds_total = self.wait_seconds_total
+        pool.wait_seconds_max = self.wait_seconds_max
+        return pool
+
+
+class InstrumentedQueuePool(_PoolStatsMixin, QueuePool):
+    """QueuePool that records checkout wait times and checkout failures."""
+
+
+class InstrumentedAsyncQueuePool(_PoolStatsMixin, AsyncAdaptedQueuePool):
+    """Same counters for the async engine's pool (checkouts wait on an asyncio queue)."""
+
+
+POOL_OPTIONS = dict(
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
 
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, poolclass=InstrumentedQueuePool, **POOL_OPTIONS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=InstrumentedAsyncQueuePool, **POOL_OPTIONS)
+# expire_on_commit=False: attributes must stay loaded after commit, lazy loads can't await
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+class Replica:
+    """A read replica with its own sync/async engines and last known health."""
+
+    def __init__(self, url: str):
+        self.url = make_url(url)
+        self.engine = create_engine(self.url, poolclass=InstrumentedQueuePool, **POOL_OPTIONS)
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self._async_session_factory = None
+        self.healthy = True
+
+    @property
+    def async_session_factory(self):
+        # Created on first use so sync-only deployments don't need the async driver
+        if self._async_session_factory is None:
+            async_engine = create_async_engine(_async_url(self.url), poolclass=InstrumentedAsyncQueuePool, **POOL_OPTIONS)
+            self._async_session_factory = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+        return self._async_session_factory
+
+    def check(self):
+        try:
+            with self.engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            healthy = True
+        except Exception as e:
+            logger.warning(f"Replica {self.url.host} failed health check: {e}")
+            healthy = False
+        if healthy and not self.healthy:
+            logger.info(f"Replica {self.url.host} is healthy again")
+        self.healthy = healthy
+
+
+def sign_write_marker(user_key: str, written_at: float) -> str:
+    payload = f"{user_key}:{written_at:.3f}"
+    signature = hmac.new(READ_YOUR_WRITES_SECRET, payload.encode(), hashlib.sha256).hexdigest()
+    return f"{payload}:{signature}"
+
+
+def verify_write_marker(marker: str) -> Optional[Tuple[str, float]]:
+    """(user_key, written_at) from a marker made by sign_write_marker, or None if invalid."""
+    try:
+        user_key, written_at, signature = marker.rsplit(":", 2)
+        expected = hmac.new(READ_YOUR_WRITES_SECRET, f"{user_key}:{written_at}".encode(), hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(signature, expected):
+            return None
+        return user_key, float(written_at)
+    except (AttributeError, ValueError):
+        return None
+
+
+# Per-request state shared with the session events (a mutable dict, so writes made in
+# threadpool handlers are visible to the middleware): the client's marker and this request's write
+_request_writes: ContextVar[Optional[Dict]] = ContextVar("request_writes", default=None)
+
+
+class ReplicaRouter:
+    """
+    Round-robin routing of read-only sessions across healthy replicas.
+    Falls back to the primary when no replica is healthy, or when the user
+    wrote within the last READ_YOUR_WRITES_SECONDS (per the request's write marker).
+    """
+
+    def __init__(self, urls):
+        self.replicas = [Replica(url) for url in urls]
+        self._cursor = itertools.count()
+        self._lock = threading.Lock()
+        self._health_thread = None
+
+    def note_write(self, user_key: str):
+        state = _request_writes.get()
+        if state is not None:
+            state["written"] = (user_key, time.time())
+
+    def _wrote_recently(self, user_key: str) -> bool:
+        state = _request_writes.get()
+        if state is None:
+            return False
+        if state["written"] and state["written"][0] == user_key:
+            return True
+        marker = verify_write_marker(state["marker"]) if state["marker"] else None
+        # Wall-clock time: the marker may have been issued by another worker or host
+        return marker is not None and marker[0] == user_key and time.time() - marker[1] < READ_YOUR_WRITES_SECONDS
+
+    def _ensure_health_checks(self):
+        if self._health_thread is None:
+            with self._lock:
+                if self._health_thread is None:
+                    self._health_thread = threading.Thread(target=self._health_loop, name="replica-health", daemon=True)
+                    self._health_thread.start()
+
+    def _health_loop(self):
+        while True:
+            for replica in self.replicas:
+                replica.check()
+            time.sleep(REPLICA_HEALTH_INTERVAL)
+
+    def pick(self, user_key: str = None):
+        """Return the next healthy replica, or None to use the primary."""
+        if not self.replicas or (user_key and self._wrote_recently(user_key)):
+            return None
+        self._ensure_health_checks()
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._cursor) % len(self.replicas)]
+            if replica.healthy:
+                return replica
+        return None
+
+
+replica_router = ReplicaRouter(DATABASE_REPLICA_URLS)
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_session_write(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_statement_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+@event.listens_for(Session, "after_commit")
+def _record_user_write(session):
+    # "user_key" is set by the auth dependencies on the request's session
+    if session.info.pop("wrote", False) and session.info.get("user_key"):
+        replica_router.note_write(session.info["user_key"])
+
 Base = declarative_base()
 
 def get_db():
@@ -20,6 +248,71 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def read_session(user_key: str = None):
+    """Yield a read-only session from a replica (or the primary, see ReplicaRouter)."""
+    replica = replica_router.pick(user_key)
+    db = (replica.session_factory if replica else SessionLocal)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def async_read_session(user_key: str = None):
+    replica = replica_router.pick(user_key)
+    async with (replica.async_session_factory if replica else AsyncSessionLocal)() as db:
+        yield db
+
+async def read_your_writes_middleware(request, call_next):
+    """
+    HTTP middleware: expose the client's last-write marker to ReplicaRouter and, when the
+    request wrote for a user, return a fresh marker (cookie + header) pinning their reads.
+    """
+    state = {
+        "marker": request.cookies.get(READ_YOUR_WRITES_COOKIE) or request.headers.get(READ_YOUR_WRITES_HEADER),
+        "written": None,
+    }
+    token = _request_writes.set(state)
+    try:
+        response = await call_next(request)
+    finally:
+        _request_writes.reset(token)
+
+    if state["written"]:
+        marker = sign_write_marker(*state["written"])
+        response.set_cookie(READ_YOUR_WRITES_COOKIE, marker, max_age=math.ceil(READ_YOUR_WRITES_SECONDS),
+                            httponly=True, samesite="lax")
+        response.headers[READ_YOUR_WRITES_HEADER] = marker
+    return response
+
+def get_pool_stats(pool=None) -> dict:
+    """Snapshot of connection pool usage for health checks and metrics."""
+    pool = pool or engine.pool
+    checkouts = getattr(pool, "checkouts", 0)
+    wait_total = getattr(pool, "wait_seconds_total", 0.0)
+    return {
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "checkouts": checkouts,
+        "checkout_failures": getattr(pool, "checkout_failures", 0),
+        "wait_seconds_avg": round(wait_total / checkouts, 6) if checkouts else 0.0,
+        "wait_seconds_max": round(getattr(pool, "wait_seconds_max", 0.0), 6),
+    }
+
 def init_db():
-    import models
-    Base.metadata.create_all(bind=engine)
+    """Apply pending Alembic migrations (`alembic upgrade head`)."""
+    from alembic import command
+    from alembic.config import Config
+
+    backend_dir = Path(__file__).resolve().parent
+    config = Config(str(backend_dir / "alembic.ini"))
+    config.set_main_option("script_location", str(backend_dir / "migrations"))
+    # Keep the application's logging configuration
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
@@ -3,48 +3,33 @@ Stub implementation ready for integration with real CV APIs like LogMeal.ai, Cla
 """
 
 import base64
-import io
-from PIL import Image
-from typing import List, Dict
+from typing import BinaryIO, Dict, List, Union
 import random
 
+import numpy as np
+
+from image_preprocessing import PreprocessedImage, preprocess
+from nutrition_db import BREAKFAST, LUNCH, nutrition_db
+
 class FoodRecognitionAI:
     """
     Food recognition using Computer Vision.
     Currently stubbed - ready for real API integration.
     """
     
-    # Common food items database for stub
-    FOOD_DATABASE = [
-        {'item': 'pasta', 'avg_serving_g': 150, 'calories_per_100g': 131},
-        {'item': 'broccoli', 'avg_serving_g': 80, 'calories_per_100g': 34},
-        {'item': 'chicken breast', 'avg_serving_g': 120, 'calories_per_100g': 165},
-        {'item': 'salmon', 'avg_serving_g': 150, 'calories_per_100g': 206},
-        {'item': 'rice', 'avg_serving_g': 150, 'calories_per_100g': 130},
-        {'item': 'salad', 'avg_serving_g': 100, 'calories_per_100g': 15},
-        {'item': 'bread', 'avg_serving_g': 50, 'calories_per_100g': 265},
-        {'item': 'banana', 'avg_serving_g': 120, 'calories_per_100g': 89},
-        {'item': 'apple', 'avg_serving_g': 180, 'calories_per_100g': 52},
-        {'item': 'orange', 'avg_serving_g': 150, 'calories_per_100g': 47},
-        {'item': 'carrot', 'avg_serving_g': 60, 'calories_per_100g': 41},
-        {'item': 'tomato', 'avg_serving_g': 100, 'calories_per_100g': 18},
-        {'item': 'avocado', 'avg_serving_g': 150, 'calories_per_100g': 160},
-        {'item': 'eggs', 'avg_serving_g': 50, 'calories_per_100g': 155},
-        {'item': 'yogurt', 'avg_serving_g': 200, 'calories_per_100g': 59},
-    ]
-    
     def __init__(self):
         # In production, initialize your CV model here
         # e.g., self.model = load_model('food_recognition_v1')
         # or self.api_key = os.getenv('LOGMEAL_API_KEY')
         pass
     
-    def recognize_food(self, image_data: bytes) -> List[Dict]:
+    def recognize_food(self, image_data: Union[bytes, BinaryIO, PreprocessedImage]) -> List[Dict]:
         """
         Recognize food items from image.
         
         Args:
-            image_data: Raw image bytes
+            image_data: Raw image bytes, a binary file object (streamed upload),
+                or an already preprocessed image
             
         Returns:
             List of detected food items with quantities
@@ -57,15 +42,14 @@ class FoodRecognitionAI:
         - OpenAI Vision API
         """
         
-        # Validate image
-        try:
-            img = Image.open(io.BytesIO(image_data))
-            width, height = img.size
-        except Exception as e:
-            raise ValueError(f"Invalid image data: {e}")
+        # Decode once at model resolution (raises ValueError on invalid images);
+        # the stub below doesn't read the pixels, a real model would
+        preprocess(image_data)
         
         # STUB: Simulate AI recognition
         # In production, this would be:
+        # results = self.model.predict(image.normalized()[None])
+        # or
         # response = requests.post('https://api.logmeal.ai/v2/recognition/dish',
         #                         files={'image': image_data},
         #                         headers={'Authorization': f'Bearer {api_key}'})
@@ -73,18 +57,20 @@ class FoodRecognitionAI:
         
         # For demo, return 2-3 random food items
         num_items = random.randint(2, 3)
-        detected_foods = random.sample(self.FOOD_DATABASE, num_items)
+        detected_ids = random.sample(range(len(nutrition_db)), num_items)
         
         results = []
-        for food in detected_foods:
+        for food_id in detected_ids:
+            food = nutrition_db.table[food_id]
             # Add some variance to quantities
             variance = random.uniform(0.8, 1.2)
             qty = int(food['avg_serving_g'] * variance)
             
             results.append({
-                'item': food['item'],
+                'food_id': food_id,
+                'item': str(food['name']),
                 'qty_g': qty,
-                'calories': int((qty / 100) * food['calories_per_100g']),
+                'calories': int((qty / 100) * food['kcal_per_100g']),
                 'confidence': round(random.uniform(0.75, 0.95), 2)
             })
         
@@ -93,24 +79,33 @@ class FoodRecognitionAI:
     def analyze_nutrition(self, food_items: List[Dict]) -> Dict:
         """
         Analyze nutritional content of detected foods.
+        Items are matched on food_id (or name) and computed in one vectorized pass;
+        unknown items contribute only their own 'calories' value.
         """
-        total_calories = sum(item.get('calories', 0) for item in food_items)
-        total_weight = sum(item.get('qty_g', 0) for item in food_items)
+        ids = nutrition_db.resolve_ids(food_items)
+        grams = np.array([item.get('qty_g', 0) for item in food_items], dtype=np.float32)
+        known = ids >= 0
+        values = nutrition_db.nutrients(ids[known], grams[known])
+        unknown_calories = sum(item.get('calories', 0) for item, matched in zip(food_items, known) if not matched)
         
         return {
-            'total_calories': total_calories,
-            'total_weight_g': total_weight,
-            'meal_type': self._classify_meal_type(food_items),
+            'total_calories': int(round(float(values['calories'].sum()) + unknown_calories)),
+            'total_weight_g': int(grams.sum()),
+            'total_protein_g': round(float(values['protein_g'].sum()), 1),
+            'total_carbs_g': round(float(values['carbs_g'].sum()), 1),
+            'total_fat_g': round(float(values['fat_g'].sum()), 1),
+            'total_fiber_g': round(float(values['fiber_g'].sum()), 1),
+            'meal_type': self.classify_meal_type(ids[known]),
             'balance_score': self._calculate_balance(food_items)
         }
     
-    def _classify_meal_type(self, items: List[Dict]) -> str:
-        """Classify the type of meal based on items."""
-        item_names = [item['item'].lower() for item in items]
+    def classify_meal_type(self, food_ids: np.ndarray) -> str:
+        """Classify the type of meal from the foods' meal-type tags."""
+        tags = nutrition_db.meal_tags(food_ids)
         
-        if any(breakfast in ' '.join(item_names) for breakfast in ['eggs', 'bread', 'yogurt', 'banana']):
+        if tags & BREAKFAST:
             return 'breakfast'
-        elif any(lunch in ' '.join(item_names) for lunch in ['salad', 'chicken', 'rice']):
+        elif tags & LUNCH:
             return 'lunch'
         else:
             return 'dinner'
@@ -0,0 +1,123 @@
+"""Hot Endpoint Logic
+Validation, statements and response building shared by the async hot endpoints (server.py)
+and their sync benchmark baseline (sync_baseline.py), so both run exactly the same workload
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+
+import models
+import rules_engine
+import safety_filter
+import schemas
+
+logger = logging.getLogger(__name__)
+
+VALID_METRICS = ('water_ml', 'sleep_hours', 'stress_level', 'steps', 'sleep_deep_seconds', 'heart_rate')
+
+# If no trigger words, generate wellness response (STUB)
+# In production, this would call OpenAI API
+WELLNESS_STUB_RESPONSE = "C'est une excellente question de bien-être! Voici mon conseil: Restez hydraté, dormez 7-9 heures, et bougez votre corps quotidiennement. Je suis là pour soutenir votre parcours de bien-être!"
+
+# List endpoints select only these columns (matching the *Response schemas) and
+# serialize the rows with orjson, skipping ORM loading and per-row model validation
+HEALTH_LOG_COLUMNS = (
+    models.HealthLog.id,
+    models.HealthLog.user_id,
+    models.HealthLog.data_source,
+    models.HealthLog.metric_type,
+    models.HealthLog.value,
+    models.HealthLog.timestamp,
+)
+
+
+def rows_response(rows) -> ORJSONResponse:
+    return ORJSONResponse([dict(row._mapping) for row in rows])
+
+
+# ============ HEALTH LOGGING ============
+
+def new_health_log(user_id, log_data: schemas.HealthLogCreate) -> models.HealthLog:
+    """
+    Raises:
+        HTTPException: 400 if the metric type is not supported
+    """
+    if log_data.metric_type not in VALID_METRICS:
+        raise HTTPException(status_code=400, detail="Invalid metric type")
+
+    return models.HealthLog(
+        user_id=user_id,
+        data_source=log_data.data_source,
+        metric_type=log_data.metric_type,
+        value=log_data.value
+    )
+
+
+def health_logs_query(user_id, metric_type: Optional[str], days: int):
+    query = select(*HEALTH_LOG_COLUMNS).where(models.HealthLog.user_id == user_id)
+
+    if metric_type:
+        query = query.where(models.HealthLog.metric_type == metric_type)
+
+    # Filter by date range
+    start_date = datetime.utcnow() - timedelta(days=days)
+    query = query.where(models.HealthLog.timestamp >= start_date)
+    return query.order_by(models.HealthLog.timestamp.desc())
+
+
+# ============ AI CHAT ============
+
+def user_chat_message(user_id, message: str) -> models.ChatHistory:
+    return models.ChatHistory(user_id=user_id, sender='user', message_text=message)
+
+
+def ai_chat_reply(user_id, message: str) -> models.ChatHistory:
+    # CRITICAL SAFETY PROTOCOL: Use enhanced safety filter
+    is_safe, safety_message = safety_filter.check_safety(message, language='en')
+
+    if not is_safe:
+        # Return hard stop response
+        logger.warning(f"Safety filter triggered for user {user_id}")
+        return models.ChatHistory(user_id=user_id, sender='ai', message_text=safety_message)
+
+    return models.ChatHistory(user_id=user_id, sender='ai', message_text=WELLNESS_STUB_RESPONSE)
+
+
+# ============ DASHBOARD ============
+
+def recent_logs_query(user_id):
+    # Recent logs (last 7 days)
+    seven_days_ago = datetime.utcnow() - timedelta(days=7)
+    return select(models.HealthLog).where(
+        models.HealthLog.user_id == user_id,
+        models.HealthLog.timestamp >= seven_days_ago
+    ).order_by(models.HealthLog.timestamp.desc()).limit(20)
+
+
+def active_wearables_query(user_id):
+    return select(models.WearableConnection).where(
+        models.WearableConnection.user_id == user_id,
+        models.WearableConnection.is_active == 1
+    )
+
+
+def dashboard_insights(user_id, session) -> Dict:
+    """Rules engine insights (sync ORM code; async callers go through AsyncSession.run_sync)."""
+    return {
+        "sleep": rules_engine.get_wellness_insight(user_id, session),
+        "hydration": rules_engine.get_hydration_insight(user_id, session)
+    }
+
+
+def dashboard_json(user: models.User, recent_logs, wearables, insights: Dict) -> str:
+    return schemas.DashboardData.model_validate({
+        "user": user,
+        "recent_logs": recent_logs,
+        "connected_wearables": wearables,
+        "insights": insights
+    }).model_dump_json()
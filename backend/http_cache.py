@@ -0,0 +1,40 @@
+"""HTTP Conditional GET
+Strong ETags derived from response content (or a data version) with If-None-Match → 304
+"""
+
+import hashlib
+
+from fastapi import Request, Response
+
+
+def etag_for(content: bytes) -> str:
+    return '"' + hashlib.blake2b(content, digest_size=16).hexdigest() + '"'
+
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison: ignore W/ prefixes
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def conditional_response(request: Request, response: Response, etag: str = None, cache_control: str = "private, no-cache") -> Response:
+    """
+    Tag a fully-rendered response and answer 304 Not Modified when the client already has it.
+
+    Args:
+        etag: Precomputed ETag (e.g. from a data version); defaults to a hash of the body
+        cache_control: "no-cache" makes clients revalidate every time, which costs only headers when unchanged
+    """
+    etag = etag or etag_for(response.body)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    if _matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return response
@@ -0,0 +1,246 @@
+"""Batched Model Inference
+Concurrent scan requests are queued, grouped into micro-batches and run in worker processes
+"""
+
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
+
+import metrics
+import workers
+
+if TYPE_CHECKING:
+    from image_preprocessing import PreprocessedImage
+
+logger = logging.getLogger(__name__)
+
+# "module:Class" of the ModelBackend to load in each worker process
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "inference:StubBackend")
+# 0 runs batches in-process on the CPU thread pool (dev / single core)
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", 2))
+INFERENCE_MAX_BATCH = int(os.getenv("INFERENCE_MAX_BATCH", 16))
+# How long the first request of a batch waits for company
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", 10))
+
+
+class ModelBackend(ABC):
+    """
+    A model that scores whole batches. One instance lives in each worker process.
+
+    predict() returns one result per image, in order; a per-image failure is
+    returned as an Exception instance instead of failing the whole batch.
+    """
+
+    def load(self):
+        """Load weights. Called once per worker process, before the first batch."""
+
+    @abstractmethod
+    def predict(self, task: str, images: List["PreprocessedImage"]) -> List[Any]:
+        """
+        Run `task` ('food' or 'skin') over a batch of preprocessed images.
+        Pixels arrive as uint8; image.normalized() gives the float32 model input.
+        """
+
+
+class StubBackend(ModelBackend):
+    """The simulated food/skin models, one image at a time."""
+
+    def load(self):
+        import food_recognition
+        import skin_analysis
+        self._models = {
+            'food': food_recognition.food_ai.recognize_food,
+            'skin': skin_analysis.skin_ai.analyze_skin,
+        }
+
+    def predict(self, task: str, images: List["PreprocessedImage"]) -> List[Any]:
+        # A real backend would np.stack the normalized() pixels and make one forward pass
+        results = []
+        for image in images:
+            try:
+                results.append(self._models[task](image))
+            except ValueError as e:
+                results.append(e)
+        return results
+
+
+def load_backend(path: str = INFERENCE_BACKEND) -> ModelBackend:
+    module_name, _, class_name = path.partition(":")
+    backend = getattr(importlib.import_module(module_name), class_name)()
+    backend.load()
+    return backend
+
+
+# Backend instance of the current (worker) process
+_backend: Optional[ModelBackend] = None
+_pool: Optional[ProcessPoolExecutor] = None
+# Batches in flight across all runners: one per worker process, whatever the task (they share the pool)
+_in_flight: Optional[asyncio.Semaphore] = None
+
+
+def _init_worker(path: str):
+    global _backend
+    _backend = load_backend(path)
+
+
+def _run_batch(task: str, images: List["PreprocessedImage"]) -> List[Any]:
+    if _backend is None:
+        _init_worker(INFERENCE_BACKEND)
+    return _backend.predict(task, images)
+
+
+def _fail(batch: List):
+    """Resolve the futures of requests that will never run, so their callers don't wait forever."""
+    for _, future in batch:
+        if not future.done():
+            future.set_exception(RuntimeError("Inference stopped"))
+
+
+class InferenceRunner:
+    """Micro-batching front end for one task."""
+
+    def __init__(self, task: str, max_batch: int = INFERENCE_MAX_BATCH, max_wait_ms: float = INFERENCE_MAX_WAIT_MS):
+        self.task = task
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Running _execute tasks; the loop only keeps weak references to tasks
+        self._batches: Set[asyncio.Task] = set()
+
+    async def submit(self, image: "PreprocessedImage") -> Any:
+        """Queue one image and wait for its result."""
+        if self._task is None:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((image, future))
+        return await future
+
+    async def _collect(self, batch: List):
+        """Add queued requests to `batch` (which has its first one) until it is full or max_wait passes."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            # Drain whatever is already queued without waiting
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+    async def _execute(self, batch: List):
+        images = [image for image, _ in batch]
+        try:
+            if _pool is None:
+                results = await workers.run_cpu(_run_batch, self.task, images)
+            else:
+                results = await asyncio.get_running_loop().run_in_executor(_pool, _run_batch, self.task, images)
+        except Exception as e:
+            logger.error(f"Inference batch failed ({self.task}, {len(batch)} images): {e}")
+            results = [e] * len(batch)
+        finally:
+            _in_flight.release()
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue  # caller went away (client disconnect)
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _run(self):
+        while True:
+            batch = []
+            acquired = False
+            try:
+                batch.append(await self._queue.get())
+                # Take a worker slot only once there is work: the slots are shared with the other
+                # runners. While all of them are busy, requests keep accumulating in the queue
+                await _in_flight.acquire()
+                acquired = True
+                await self._collect(batch)
+            except asyncio.CancelledError:
+                if acquired:
+                    _in_flight.release()
+                _fail(batch)
+                raise
+            metrics.INFERENCE_BATCH_SIZE.observe(len(batch), task=self.task)
+            execution = asyncio.get_running_loop().create_task(self._execute(batch))
+            self._batches.add(execution)
+            execution.add_done_callback(self._batches.discard)
+
+    def start(self):
+        global _in_flight
+        if self._task is None:
+            if _in_flight is None:
+                _in_flight = asyncio.Semaphore(max(INFERENCE_WORKERS, 1))
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop batching, fail the requests still queued and let the batches in flight finish."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+            queued = []
+            while not self._queue.empty():
+                queued.append(self._queue.get_nowait())
+            _fail(queued)
+            await asyncio.gather(*self._batches, return_exceptions=True)
+
+
+food_runner = InferenceRunner('food')
+skin_runner = InferenceRunner('skin')
+
+
+def start(n_workers: int = INFERENCE_WORKERS, backend: str = INFERENCE_BACKEND):
+    """Start the worker processes (they load the model once) and the batch loops."""
+    global _pool, _in_flight
+    if n_workers > 0 and _pool is None:
+        # spawn: the web process has threads (DB pool, replica checks) that fork would copy mid-state
+        _pool = ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(backend,),
+        )
+    if _in_flight is None:
+        _in_flight = asyncio.Semaphore(max(n_workers, 1))
+    food_runner.start()
+    skin_runner.start()
+
+
+async def stop():
+    global _pool, _in_flight
+    await food_runner.stop()
+    await skin_runner.stop()
+    _in_flight = None
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+async def recognize_food(image: "PreprocessedImage") -> List[Dict]:
+    return await food_runner.submit(image)
+
+
+async def analyze_skin(image: "PreprocessedImage") -> Dict:
+    return await skin_runner.submit(image)
@@ -0,0 +1,105 @@
+"""Meal Logging
+Confirmed food scans become one meal row, its items in a single multi-row insert, and a daily-totals upsert
+"""
+
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+import models
+from food_recognition import food_ai
+from nutrition_db import MACRO_FIELDS, nutrition_db
+
+TOTAL_FIELDS = ('calories',) + MACRO_FIELDS
+
+
+def log_meal(db: Session, user_id, items: List[Dict], scan_id=None, eaten_at: Optional[datetime] = None) -> Dict:
+    """
+    Validate `items` ({'food_id' or 'item', 'qty_g'}) against the nutrition database and
+    store them as a meal. Calories and macros are computed server-side; client values
+    are ignored. Commits.
+
+    Idempotent per scan: when `scan_id` already has a meal, nothing is written (the daily
+    totals are not incremented again) and that meal is returned.
+
+    Raises:
+        ValueError: If the list is empty or an item is not in the nutrition database
+    """
+    if not items:
+        raise ValueError("No food items to log")
+
+    ids = nutrition_db.resolve_ids(items)
+    unknown = [str(item.get('item') or item.get('food_id')) for item, food_id in zip(items, ids) if food_id < 0]
+    if unknown:
+        raise ValueError(f"Unknown food items: {', '.join(unknown)}")
+
+    grams = np.array([item['qty_g'] for item in items], dtype=np.float32)
+    values = nutrition_db.nutrients(ids, grams)
+    totals = {field: round(float(values[field].sum()), 1) for field in TOTAL_FIELDS}
+    eaten_at = eaten_at or datetime.utcnow()
+
+    meal_type = food_ai.classify_meal_type(ids)
+    stmt = pg_insert(models.Meal).values(
+        id=models.uuid7(),
+        user_id=user_id,
+        scan_id=scan_id,
+        meal_type=meal_type,
+        eaten_at=eaten_at,
+        **totals,
+    )
+    if scan_id is not None:
+        # A scan is logged once: a retried confirm inserts nothing and gets the existing meal back
+        stmt = stmt.on_conflict_do_nothing(index_elements=[models.Meal.scan_id])
+    meal_id = db.execute(stmt.returning(models.Meal.id)).scalar()
+    if meal_id is None:
+        db.rollback()
+        return logged_meal(db, scan_id)
+
+    db.execute(insert(models.MealItem).values([
+        {
+            'meal_id': meal_id,
+            'food_id': int(food_id),
+            'name': str(nutrition_db.table[food_id]['name']),
+            'grams': float(grams[i]),
+            **{field: round(float(values[field][i]), 1) for field in TOTAL_FIELDS},
+        }
+        for i, food_id in enumerate(ids)
+    ]))
+
+    # Increment the day's running totals (row created on the first meal of the day);
+    # only reached when the meal row was actually inserted
+    day: date = eaten_at.date()
+    stmt = pg_insert(models.DailyNutrition).values(
+        user_id=user_id, day=day, meal_count=1, updated_at=datetime.utcnow(), **totals
+    )
+    table = models.DailyNutrition.__table__
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.day],
+        set_={
+            **{field: table.c[field] + stmt.excluded[field] for field in TOTAL_FIELDS},
+            'meal_count': table.c.meal_count + 1,
+            'updated_at': stmt.excluded.updated_at,
+        },
+    )
+    db.execute(stmt)
+    db.commit()
+
+    return {'meal_id': str(meal_id), 'meal_type': meal_type, 'items_logged': len(items), **totals}
+
+
+def logged_meal(db: Session, scan_id) -> Dict:
+    """The meal already logged for `scan_id`, in log_meal's return format."""
+    meal = db.execute(select(models.Meal).where(models.Meal.scan_id == scan_id)).scalar_one()
+    items_logged = db.execute(
+        select(func.count()).select_from(models.MealItem).where(models.MealItem.meal_id == meal.id)
+    ).scalar()
+    return {
+        'meal_id': str(meal.id),
+        'meal_type': meal.meal_type,
+        'items_logged': items_logged,
+        **{field: getattr(meal, field) for field in TOTAL_FIELDS},
+    }
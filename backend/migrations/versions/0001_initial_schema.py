@@ -0,0 +1,116 @@
+"""Initial schema (tables previously created by Base.metadata.create_all)
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Databases created before migrations existed already have this schema:
+mark them with `alembic stamp 0001` instead of upgrading.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'users',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.Column('tier', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime()),
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    op.create_table(
+        'user_profiles',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True),
+        sa.Column('user_id', UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, unique=True),
+        sa.Column('first_name', sa.String()),
+        sa.Column('last_name', sa.String()),
+        sa.Column('dob', sa.DateTime()),
+    )
+
+    op.create_table(
+        'health_logs',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True),
+        sa.Column('user_id', UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('data_source', sa.String(), nullable=False),
+        sa.Column('metric_type', sa.String(), nullable=False),
+        sa.Column('value', sa.Float(), nullable=False),
+        sa.Column('timestamp', sa.DateTime()),
+    )
+    op.create_index('ix_health_logs_user_id', 'health_logs', ['user_id'])
+    op.create_index('ix_health_logs_timestamp', 'health_logs', ['timestamp'])
+
+    op.create_table(
+        'chat_history',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True),
+        sa.Column('user_id', UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('sender', sa.String(), nullable=False),
+        sa.Column('message_text', sa.Text(), nullable=False),
+        sa.Column('timestamp', sa.DateTime()),
+    )
+    op.create_index('ix_chat_history_user_id', 'chat_history', ['user_id'])
+
+    op.create_table(
+        'products',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('description', sa.Text()),
+        sa.Column('short_description', sa.String()),
+        sa.Column('image_url', sa.String()),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('category', sa.String(), nullable=False),
+        sa.Column('partner_url', sa.String(), nullable=False),
+        sa.Column('is_vetted', sa.Integer()),
+        sa.Column('created_at', sa.DateTime()),
+    )
+    op.create_index('ix_products_category', 'products', ['category'])
+
+    op.create_table(
+        'file_scans',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True),
+        sa.Column('user_id', UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('file_type', sa.String(), nullable=False),
+        sa.Column('storage_path', sa.String(), nullable=False),
+        sa.Column('uploaded_at', sa.DateTime()),
+    )
+    op.create_index('ix_file_scans_user_id', 'file_scans', ['user_id'])
+
+    op.create_table(
+        'wearable_connections',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True),
+        sa.Column('user_id', UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('wearable_type', sa.String(), nullable=False),
+        sa.Column('connected_at', sa.DateTime()),
+        sa.Column('is_active', sa.Integer()),
+    )
+    op.create_index('ix_wearable_connections_user_id', 'wearable_connections', ['user_id'])
+
+    for table in ('dna_kits', 'blood_kits'):
+        op.create_table(
+            table,
+            sa.Column('id', UUID(as_uuid=True), primary_key=True),
+            sa.Column('user_id', UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=True),
+            sa.Column('kit_serial_id', sa.String(), nullable=False),
+            sa.Column('status', sa.String(), nullable=False),
+            sa.Column('registered_at', sa.DateTime(), nullable=True),
+            sa.Column('completed_at', sa.DateTime(), nullable=True),
+            sa.Column('created_at', sa.DateTime()),
+        )
+        op.create_index(f'ix_{table}_user_id', table, ['user_id'])
+        op.create_index(f'ix_{table}_kit_serial_id', table, ['kit_serial_id'], unique=True)
+
+
+def downgrade():
+    for table in ('blood_kits', 'dna_kits', 'wearable_connections', 'file_scans',
+                  'products', 'chat_history', 'health_logs', 'user_profiles', 'users'):
+        op.drop_table(table)
@@ -0,0 +1,28 @@
+"""Time-ordered UUIDv7 ids for append-heavy tables
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+health_logs, chat_history and file_scans get UUIDv7 ids for new rows from
+models.uuid7() (ids are generated by the application, there is no column
+default to change). Existing uuid4 rows are left as they are: their ids
+have been handed to clients (e.g. scan_id) and rewriting every primary key
+would rewrite each table and its indexes. Both versions share the uuid
+column type, and the index becomes append-mostly as new rows accumulate.
+
+Nothing to migrate; the revision is kept so the history stays linear.
+"""
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    pass
+
+
+def downgrade():
+    pass
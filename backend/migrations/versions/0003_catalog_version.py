@@ -0,0 +1,28 @@
+"""Catalog version row for process-local catalog cache invalidation
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'catalog_version',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime()),
+    )
+    op.execute("INSERT INTO catalog_version (id, version, updated_at) VALUES (1, 1, now())")
+
+
+def downgrade():
+    op.drop_table('catalog_version')
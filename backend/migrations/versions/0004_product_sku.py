@@ -0,0 +1,47 @@
+"""Stable product SKUs and soft deletes for idempotent catalog imports
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+Existing products get the last path segment of partner_url as their SKU.
+seed_db uses the same convention, so the next import updates those rows
+in place and their ids stay the same.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('products', sa.Column('sku', sa.String(), nullable=True))
+    op.add_column('products', sa.Column('updated_at', sa.DateTime()))
+    op.add_column('products', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+
+    op.execute("""
+        UPDATE products p SET sku = s.slug, updated_at = p.created_at
+        FROM (
+            SELECT id,
+                   regexp_replace(partner_url, '^.*/', '') AS slug,
+                   row_number() OVER (PARTITION BY regexp_replace(partner_url, '^.*/', '') ORDER BY created_at DESC) AS rn
+            FROM products
+        ) s
+        WHERE p.id = s.id AND s.rn = 1
+    """)
+    # Duplicate partner URLs: keep the rows, but with a unique placeholder SKU
+    op.execute("UPDATE products SET sku = 'legacy-' || id, updated_at = created_at WHERE sku IS NULL")
+
+    op.alter_column('products', 'sku', nullable=False)
+    op.create_index('ix_products_sku', 'products', ['sku'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_products_sku', table_name='products')
+    op.drop_column('products', 'deleted_at')
+    op.drop_column('products', 'updated_at')
+    op.drop_column('products', 'sku')
@@ -0,0 +1,30 @@
+"""Append-only product click log
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'product_clicks',
+        sa.Column('id', sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column('product_id', UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', UUID(as_uuid=True), nullable=True),
+        sa.Column('clicked_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_product_clicks_product_id_clicked_at', 'product_clicks', ['product_id', 'clicked_at'])
+
+
+def downgrade():
+    op.drop_table('product_clicks')
@@ -0,0 +1,27 @@
+"""Content hash on file_scans for deduplicated blob storage
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+Existing rows keep their absolute storage_path and a NULL content_hash:
+they were never deduplicated, so each one owns its file.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('file_scans', sa.Column('content_hash', sa.String(64), nullable=True))
+    op.create_index('ix_file_scans_content_hash', 'file_scans', ['content_hash'])
+
+
+def downgrade():
+    op.drop_index('ix_file_scans_content_hash', table_name='file_scans')
+    op.drop_column('file_scans', 'content_hash')
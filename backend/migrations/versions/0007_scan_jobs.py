@@ -0,0 +1,36 @@
+"""Asynchronous scan job state on file_scans
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('file_scans', sa.Column('status', sa.String(), nullable=False, server_default='done'))
+    op.add_column('file_scans', sa.Column('result', JSONB(), nullable=True))
+    op.add_column('file_scans', sa.Column('error', sa.String(), nullable=True))
+    op.add_column('file_scans', sa.Column('started_at', sa.DateTime(), nullable=True))
+    op.add_column('file_scans', sa.Column('completed_at', sa.DateTime(), nullable=True))
+    op.create_index(
+        'ix_file_scans_queue', 'file_scans', ['uploaded_at'],
+        postgresql_where=sa.text("status IN ('pending', 'processing')"),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_file_scans_queue', table_name='file_scans')
+    op.drop_column('file_scans', 'completed_at')
+    op.drop_column('file_scans', 'started_at')
+    op.drop_column('file_scans', 'error')
+    op.drop_column('file_scans', 'result')
+    op.drop_column('file_scans', 'status')
@@ -0,0 +1,56 @@
+"""Meals, meal items and per-day nutrition totals
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+MACROS = ('calories', 'protein_g', 'carbs_g', 'fat_g', 'fiber_g')
+
+
+def upgrade():
+    op.create_table(
+        'meals',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True),
+        sa.Column('user_id', UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('scan_id', UUID(as_uuid=True), sa.ForeignKey('file_scans.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('meal_type', sa.String(), nullable=True),
+        sa.Column('eaten_at', sa.DateTime(), nullable=False),
+        *(sa.Column(name, sa.Float(), nullable=False, server_default='0') for name in MACROS),
+    )
+    op.create_index('ix_meals_user_id_eaten_at', 'meals', ['user_id', 'eaten_at'])
+
+    op.create_table(
+        'meal_items',
+        sa.Column('id', sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column('meal_id', UUID(as_uuid=True), sa.ForeignKey('meals.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('food_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('grams', sa.Float(), nullable=False),
+        *(sa.Column(name, sa.Float(), nullable=False) for name in MACROS),
+    )
+    op.create_index('ix_meal_items_meal_id', 'meal_items', ['meal_id'])
+
+    op.create_table(
+        'daily_nutrition',
+        sa.Column('user_id', UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('day', sa.Date(), primary_key=True),
+        *(sa.Column(name, sa.Float(), nullable=False, server_default='0') for name in MACROS),
+        sa.Column('meal_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime()),
+    )
+
+
+def downgrade():
+    op.drop_table('daily_nutrition')
+    op.drop_table('meal_items')
+    op.drop_table('meals')
@@ -0,0 +1,68 @@
+"""Persisted skin analyses
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+
+Skin scans that already stored their result on file_scans (0007) are backfilled,
+reusing the scan id as the analysis id.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of skin_history.METRIC_LEVELS at this revision
+METRIC_LEVELS = {
+    'hydration_level': ('low', 'medium', 'high'),
+    'pore_visibility': ('minimal', 'visible', 'prominent'),
+    'fine_lines': ('minimal', 'moderate', 'visible'),
+    'skin_tone': ('even', 'slightly_uneven'),
+    'radiance': ('dull', 'normal', 'radiant'),
+    'texture': ('smooth', 'normal', 'rough'),
+}
+METRICS = tuple(METRIC_LEVELS)
+
+
+def upgrade():
+    op.create_table(
+        'skin_analyses',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True),
+        sa.Column('user_id', UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('scan_id', UUID(as_uuid=True), sa.ForeignKey('file_scans.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        *(sa.Column(metric, sa.SmallInteger()) for metric in METRICS),
+        sa.Column('overall_score', sa.SmallInteger(), nullable=False),
+        sa.Column('score_delta', sa.SmallInteger(), nullable=True),
+        sa.Column('recommendations', JSONB(), nullable=True),
+    )
+    op.create_index('ix_skin_analyses_user_id_created_at', 'skin_analyses', ['user_id', 'created_at'])
+
+    codes = ", ".join(
+        "array_position(ARRAY[{}]::text[], result->'analysis'->>'{}') - 1".format(
+            ", ".join(f"'{level}'" for level in levels), metric)
+        for metric, levels in METRIC_LEVELS.items()
+    )
+    op.execute(f"""
+        INSERT INTO skin_analyses (id, user_id, scan_id, created_at, {', '.join(METRICS)},
+                                   overall_score, score_delta, recommendations)
+        SELECT id, user_id, id, created_at, {', '.join(METRICS)}, overall_score,
+               overall_score - lag(overall_score) OVER (PARTITION BY user_id ORDER BY created_at),
+               recommendations
+        FROM (
+            SELECT id, user_id, COALESCE(completed_at, uploaded_at) AS created_at, {codes},
+                   (result->'analysis'->>'overall_score')::smallint AS overall_score,
+                   result->'analysis'->'recommendations' AS recommendations
+            FROM file_scans
+            WHERE file_type = 'skin_scan' AND status = 'done' AND result ? 'analysis'
+        ) scans({', '.join(('id', 'user_id', 'created_at') + METRICS + ('overall_score', 'recommendations'))})
+    """)
+
+
+def downgrade():
+    op.drop_table('skin_analyses')
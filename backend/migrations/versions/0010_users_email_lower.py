@@ -0,0 +1,25 @@
+"""Case-insensitive email lookups
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+
+New accounts store auth.normalize_email() (lower-case); lookups compare
+lower(email) so accounts created before that still match.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')])
+
+
+def downgrade():
+    op.drop_index('ix_users_email_lower', table_name='users')
@@ -0,0 +1,24 @@
+"""Index file_scans.storage_path for blob reference counts
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19
+
+storage.release() counts the rows still pointing at a blob by storage_path
+(the key includes the suffix, so content_hash alone is not the blob).
+"""
+
+from alembic import op
+
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_file_scans_storage_path', 'file_scans', ['storage_path'])
+
+
+def downgrade():
+    op.drop_index('ix_file_scans_storage_path', table_name='file_scans')
@@ -0,0 +1,35 @@
+"""One meal per confirmed food scan
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19
+
+meal_logging.log_meal inserts ON CONFLICT (scan_id) DO NOTHING so a retried
+confirm does not log the meal (and its daily totals) twice. Duplicates logged
+before this keep their rows; all but the earliest are unlinked from the scan.
+"""
+
+from alembic import op
+
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        UPDATE meals SET scan_id = NULL
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (PARTITION BY scan_id ORDER BY id) AS n
+                FROM meals WHERE scan_id IS NOT NULL
+            ) ranked
+            WHERE n > 1
+        )
+    """)
+    op.create_index('uq_meals_scan_id', 'meals', ['scan_id'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_meals_scan_id', table_name='meals')
@@ -0,0 +1,25 @@
+"""Claim count of asynchronous scan jobs
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19
+
+Every claim increments attempts; scan_jobs fails a job once it has been claimed
+more than SCAN_JOB_MAX_ATTEMPTS times (e.g. an image that keeps crashing workers).
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('file_scans', sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('file_scans', 'attempts')
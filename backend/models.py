@@ -1,10 +1,26 @@
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Integer, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import func, Column, String, Float, Date, DateTime, ForeignKey, Integer, BigInteger, SmallInteger, Text, Index
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
+import os
+import time
 import uuid
 from database import Base
 
+def uuid7() -> uuid.UUID:
+    """
+    Time-ordered UUID (RFC 9562 version 7): 48-bit Unix ms timestamp, then random bits.
+    Consecutive inserts land on the right-most B-tree page instead of random pages.
+    """
+    unix_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    value = (unix_ms & 0xFFFFFFFFFFFF) << 80
+    value |= 0x7 << 76                              # version
+    value |= ((rand >> 62) & 0xFFF) << 64           # rand_a (12 bits)
+    value |= 0b10 << 62                             # variant
+    value |= rand & 0x3FFFFFFFFFFFFFFF              # rand_b (62 bits)
+    return uuid.UUID(int=value)
+
 class User(Base):
     __tablename__ = "users"
     
@@ -22,6 +38,11 @@ class User(Base):
     wearable_connections = relationship("WearableConnection", back_populates="user", cascade="all, delete-orphan")
     dna_kits = relationship("DnaKit", back_populates="user")
     blood_kits = relationship("BloodKit", back_populates="user")
+    
+    __table_args__ = (
+        # Case-insensitive lookups (auth.email_matches)
+        Index('ix_users_email_lower', func.lower(email)),
+    )
 
 class UserProfile(Base):
     __tablename__ = "user_profiles"
@@ -38,7 +59,7 @@ class UserProfile(Base):
 class HealthLog(Base):
     __tablename__ = "health_logs"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
     data_source = Column(String, nullable=False)  # 'manual', 'apple_health', 'oura', 'garmin', 'whoop', 'google_fit'
     metric_type = Column(String, nullable=False)  # 'water_ml', 'steps', 'sleep_hours', 'stress_level', 'sleep_deep_seconds'
@@ -51,7 +72,7 @@ class HealthLog(Base):
 class ChatHistory(Base):
     __tablename__ = "chat_history"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
     sender = Column(String, nullable=False)  # 'user' or 'ai'
     message_text = Column(Text, nullable=False)
@@ -64,6 +85,7 @@ class Product(Base):
     __tablename__ = "products"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    sku = Column(String, unique=True, nullable=False, index=True)  # Stable partner SKU, upsert key for catalog imports
     name = Column(String, nullable=False)
     description = Column(Text)
     short_description = Column(String)
@@ -73,18 +95,55 @@ class Product(Base):
     partner_url = Column(String, nullable=False)
     is_vetted = Column(Integer, default=1)  # 1 = true, 0 = false
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    deleted_at = Column(DateTime, nullable=True)  # Soft delete: set when a product leaves the partner feed
+
+class ProductClick(Base):
+    __tablename__ = "product_clicks"
+    
+    # Append-only click-through log for partner billing, written in batches by click_tracker
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    product_id = Column(UUID(as_uuid=True), nullable=False)
+    user_id = Column(UUID(as_uuid=True), nullable=True)
+    clicked_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('ix_product_clicks_product_id_clicked_at', 'product_id', 'clicked_at'),
+    )
+
+class CatalogVersion(Base):
+    __tablename__ = "catalog_version"
+    
+    # Single row (id=1), bumped whenever the product catalog changes
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class FileScan(Base):
     __tablename__ = "file_scans"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
     file_type = Column(String, nullable=False)  # 'blood_pdf', 'skin_scan', 'food_scan'
-    storage_path = Column(String, nullable=False)
+    storage_path = Column(String, nullable=False, index=True)  # storage key (see storage.py)
+    # SHA-256 of the content; rows sharing it share one stored blob
+    content_hash = Column(String(64), nullable=True, index=True)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
+    # Async scan jobs: 'pending' -> 'processing' -> 'done' | 'failed' (synchronous scans are stored 'done')
+    status = Column(String, nullable=False, default='done', server_default='done')
+    result = Column(JSONB, nullable=True)
+    error = Column(String, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default='0')  # job claims so far
     
     # Relationship
     user = relationship("User", back_populates="file_scans")
+    
+    __table_args__ = (
+        # Job queue scan: only unfinished rows are indexed
+        Index('ix_file_scans_queue', 'uploaded_at', postgresql_where=status.in_(('pending', 'processing'))),
+    )
 
 class WearableConnection(Base):
     __tablename__ = "wearable_connections"
@@ -125,3 +184,75 @@ class BloodKit(Base):
     
     # Relationship
     user = relationship("User", back_populates="blood_kits")
+
+class Meal(Base):
+    __tablename__ = "meals"
+    
+    # One confirmed food scan (or manual entry); totals are denormalized from its items
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    scan_id = Column(UUID(as_uuid=True), ForeignKey('file_scans.id', ondelete='SET NULL'), nullable=True)
+    meal_type = Column(String, nullable=True)  # 'breakfast', 'lunch', 'dinner'
+    eaten_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    calories = Column(Float, nullable=False, default=0)
+    protein_g = Column(Float, nullable=False, default=0)
+    carbs_g = Column(Float, nullable=False, default=0)
+    fat_g = Column(Float, nullable=False, default=0)
+    fiber_g = Column(Float, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index('ix_meals_user_id_eaten_at', 'user_id', 'eaten_at'),
+        # One meal per confirmed scan (meal_logging.log_meal inserts ON CONFLICT DO NOTHING)
+        Index('uq_meals_scan_id', 'scan_id', unique=True),
+    )
+
+class MealItem(Base):
+    __tablename__ = "meal_items"
+    
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    meal_id = Column(UUID(as_uuid=True), ForeignKey('meals.id', ondelete='CASCADE'), nullable=False, index=True)
+    food_id = Column(Integer, nullable=False)  # row id in nutrition_db
+    name = Column(String, nullable=False)
+    grams = Column(Float, nullable=False)
+    calories = Column(Float, nullable=False)
+    protein_g = Column(Float, nullable=False)
+    carbs_g = Column(Float, nullable=False)
+    fat_g = Column(Float, nullable=False)
+    fiber_g = Column(Float, nullable=False)
+
+class DailyNutrition(Base):
+    __tablename__ = "daily_nutrition"
+    
+    # Running per-day totals, incremented by each logged meal (UTC days)
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    day = Column(Date, primary_key=True)
+    calories = Column(Float, nullable=False, default=0)
+    protein_g = Column(Float, nullable=False, default=0)
+    carbs_g = Column(Float, nullable=False, default=0)
+    fat_g = Column(Float, nullable=False, default=0)
+    fiber_g = Column(Float, nullable=False, default=0)
+    meal_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class SkinAnalysis(Base):
+    __tablename__ = "skin_analyses"
+    
+    # One row per skin scan; metrics are level codes (see skin_history.METRIC_LEVELS)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    scan_id = Column(UUID(as_uuid=True), ForeignKey('file_scans.id', ondelete='SET NULL'), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    hydration_level = Column(SmallInteger)
+    pore_visibility = Column(SmallInteger)
+    fine_lines = Column(SmallInteger)
+    skin_tone = Column(SmallInteger)
+    radiance = Column(SmallInteger)
+    texture = Column(SmallInteger)
+    overall_score = Column(SmallInteger, nullable=False)
+    # overall_score minus the user's previous analysis (NULL for the first one)
+    score_delta = Column(SmallInteger, nullable=True)
+    recommendations = Column(JSONB, nullable=True)
+    
+    __table_args__ = (
+        Index('ix_skin_analyses_user_id_created_at', 'user_id', 'created_at'),
+    )
@@ -0,0 +1,175 @@
+"""Nutrition Database
+Foods with macros in a NumPy structured array, memory-mapped from .npy so worker processes share pages
+
+Build the table from a CSV (name, avg_serving_g, kcal_per_100g, protein_g, carbs_g, fat_g, fiber_g[, meal_tags]):
+    python nutrition_db.py build foods.csv [data/nutrition.npy]
+"""
+
+import bisect
+import csv
+import os
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+NUTRITION_DB_PATH = Path(os.getenv("NUTRITION_DB_PATH", Path(__file__).resolve().parent / "data" / "nutrition.npy"))
+
+# Meal-type hints (bit flags)
+BREAKFAST = 1
+LUNCH = 2
+
+# Row i has id i: lookup by id is a plain array index
+FOOD_DTYPE = np.dtype([
+    ('id', '<i4'),
+    ('name', '<U64'),
+    ('avg_serving_g', '<f4'),
+    ('kcal_per_100g', '<f4'),
+    ('protein_g', '<f4'),   # macros per 100 g
+    ('carbs_g', '<f4'),
+    ('fat_g', '<f4'),
+    ('fiber_g', '<f4'),
+    ('meal_tags', 'u1'),
+])
+MACRO_FIELDS = ('protein_g', 'carbs_g', 'fat_g', 'fiber_g')
+
+# Used when no built table is on disk (dev, tests): the original stub foods
+FALLBACK_FOODS = [
+    # name, avg_serving_g, kcal, protein, carbs, fat, fiber, meal_tags
+    ('pasta', 150, 131, 5.0, 25.0, 1.1, 1.8, 0),
+    ('broccoli', 80, 34, 2.8, 6.6, 0.4, 2.6, 0),
+    ('chicken breast', 120, 165, 31.0, 0.0, 3.6, 0.0, LUNCH),
+    ('salmon', 150, 206, 22.0, 0.0, 13.0, 0.0, 0),
+    ('rice', 150, 130, 2.7, 28.0, 0.3, 0.4, LUNCH),
+    ('salad', 100, 15, 1.4, 2.9, 0.2, 1.3, LUNCH),
+    ('bread', 50, 265, 9.0, 49.0, 3.2, 2.7, BREAKFAST),
+    ('banana', 120, 89, 1.1, 22.8, 0.3, 2.6, BREAKFAST),
+    ('apple', 180, 52, 0.3, 13.8, 0.2, 2.4, 0),
+    ('orange', 150, 47, 0.9, 11.8, 0.1, 2.4, 0),
+    ('carrot', 60, 41, 0.9, 9.6, 0.2, 2.8, 0),
+    ('tomato', 100, 18, 0.9, 3.9, 0.2, 1.2, 0),
+    ('avocado', 150, 160, 2.0, 8.5, 14.7, 6.7, 0),
+    ('eggs', 50, 155, 13.0, 1.1, 11.0, 0.0, BREAKFAST),
+    ('yogurt', 200, 59, 10.0, 3.6, 0.4, 0.0, BREAKFAST),
+]
+
+
+def _fold(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return " ".join("".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower().split())
+
+
+def build_table(rows: Iterable[tuple]) -> np.ndarray:
+    rows = list(rows)
+    table = np.zeros(len(rows), dtype=FOOD_DTYPE)
+    for food_id, row in enumerate(rows):
+        table[food_id] = (food_id, *row)
+    return table
+
+
+class NutritionDB:
+    """Read-only food table with an id index and a sorted prefix index for type-ahead."""
+
+    def __init__(self, table: np.ndarray):
+        self.table = table
+        folded = [_fold(str(name)) for name in table['name']]
+        self._ids_by_name = {name: food_id for food_id, name in enumerate(folded)}
+
+        # Every word start is a key, so "bre" finds "chicken breast" as well as "bread"
+        keys = []
+        for food_id, name in enumerate(folded):
+            words = name.split(" ")
+            for i in range(len(words)):
+                keys.append((" ".join(words[i:]), food_id))
+        keys.sort()
+        self._prefix_keys = [key for key, _ in keys]
+        self._prefix_ids = [food_id for _, food_id in keys]
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def to_dict(self, food_id: int) -> Dict:
+        row = self.table[food_id]
+        return {
+            'id': int(row['id']),
+            'name': str(row['name']),
+            'avg_serving_g': float(row['avg_serving_g']),
+            'kcal_per_100g': float(row['kcal_per_100g']),
+            **{field: float(row[field]) for field in MACRO_FIELDS},
+        }
+
+    def get(self, food_id: int) -> Optional[Dict]:
+        if not 0 <= food_id < len(self.table):
+            return None
+        return self.to_dict(food_id)
+
+    def id_for_name(self, name: str) -> Optional[int]:
+        return self._ids_by_name.get(_fold(name))
+
+    def search_prefix(self, prefix: str, limit: int = 10) -> List[Dict]:
+        prefix = _fold(prefix)
+        if not prefix:
+            return []
+        start = bisect.bisect_left(self._prefix_keys, prefix)
+        seen, results = set(), []
+        for key, food_id in zip(self._prefix_keys[start:], self._prefix_ids[start:]):
+            if not key.startswith(prefix) or len(results) >= limit:
+                break
+            if food_id not in seen:
+                seen.add(food_id)
+                results.append(self.to_dict(food_id))
+        return results
+
+    def resolve_ids(self, items: List[Dict]) -> np.ndarray:
+        """food_id for each item (falling back to its name); -1 when unknown."""
+        ids = np.empty(len(items), dtype=np.int64)
+        for i, item in enumerate(items):
+            try:
+                food_id = int(item['food_id'])
+            except (KeyError, TypeError, ValueError):
+                food_id = self.id_for_name(str(item.get('item', '')))
+            ids[i] = food_id if food_id is not None and 0 <= food_id < len(self.table) else -1
+        return ids
+
+    def nutrients(self, ids: np.ndarray, grams: np.ndarray) -> Dict[str, np.ndarray]:
+        """Per-item calories and macros for `grams` of each food (vectorized over items)."""
+        rows = self.table[ids]
+        scale = np.asarray(grams, dtype=np.float32) / 100.0
+        values = {'calories': rows['kcal_per_100g'] * scale}
+        for field in MACRO_FIELDS:
+            values[field] = rows[field] * scale
+        return values
+
+    def meal_tags(self, ids: np.ndarray) -> int:
+        return int(np.bitwise_or.reduce(self.table['meal_tags'][ids], initial=0))
+
+
+def load(path: Path = NUTRITION_DB_PATH) -> NutritionDB:
+    if path.exists():
+        # Memory-mapped: pages are shared by every process on the host
+        return NutritionDB(np.load(path, mmap_mode='r'))
+    return NutritionDB(build_table(FALLBACK_FOODS))
+
+
+nutrition_db = load()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3 or sys.argv[1] != "build":
+        print("Usage: python nutrition_db.py build <foods.csv> [output.npy]")
+        sys.exit(1)
+
+    output = Path(sys.argv[3]) if len(sys.argv) > 3 else NUTRITION_DB_PATH
+    with open(sys.argv[2], newline="", encoding="utf-8-sig") as f:
+        rows = [
+            (row['name'].strip(), float(row['avg_serving_g']), float(row['kcal_per_100g']),
+             *(float(row[field] or 0) for field in MACRO_FIELDS), int(row.get('meal_tags') or 0))
+            for row in csv.DictReader(f)
+        ]
+    table = build_table(rows)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    np.save(output, table)
+    print(f"✅ Wrote {len(table)} foods to {output} ({output.stat().st_size / 2**20:.1f} MB)")
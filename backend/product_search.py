@@ -0,0 +1,111 @@
+"""Product Search
+In-memory inverted index over the catalog: accent folding, BM25 ranking, prefix type-ahead
+"""
+
+import bisect
+import heapq
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List
+
+from catalog_cache import CatalogSnapshot, catalog
+
+# Field weights (BM25F-style: weighted term frequencies and document length)
+FIELD_WEIGHTS = {'name': 3.0, 'short_description': 2.0, 'description': 1.0}
+K1 = 1.2
+B = 0.75
+# Max index terms a type-ahead prefix expands to, and their score discount vs an exact match
+MAX_PREFIX_EXPANSIONS = 50
+PREFIX_DISCOUNT = 0.8
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents ("Hydratation Élevée" -> "hydratation elevee")."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(fold(text or ""))
+
+
+class SearchIndex:
+    """Inverted index for one catalog snapshot."""
+
+    def __init__(self, products: List[Dict]):
+        self.products = products
+        self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self.doc_lengths: List[float] = []
+
+        for doc, product in enumerate(products):
+            length = 0.0
+            for field, weight in FIELD_WEIGHTS.items():
+                for term in tokenize(product.get(field)):
+                    self.postings[term][doc] = self.postings[term].get(doc, 0.0) + weight
+                    length += weight
+            self.doc_lengths.append(length)
+
+        self.avg_doc_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+        self.terms = sorted(self.postings)
+        n_docs = len(products)
+        self.idf = {
+            term: math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self.terms, prefix)
+        expansions = []
+        for term in self.terms[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            expansions.append(term)
+        return expansions
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        terms = tokenize(query)
+        if not terms or not self.products:
+            return []
+
+        scores: Dict[int, float] = defaultdict(float)
+        for position, query_term in enumerate(terms):
+            # The last term is still being typed: match it as a prefix
+            candidates = self._expand_prefix(query_term) if position == len(terms) - 1 else [query_term]
+            for term in candidates:
+                docs = self.postings.get(term)
+                if not docs:
+                    continue
+                boost = 1.0 if term == query_term else PREFIX_DISCOUNT
+                idf = self.idf[term]
+                for doc, tf in docs.items():
+                    norm = K1 * (1 - B + B * self.doc_lengths[doc] / self.avg_doc_length)
+                    scores[doc] += boost * idf * tf * (K1 + 1) / (tf + norm)
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [self.products[doc] for doc, _ in best]
+
+
+_index = SearchIndex([])
+_index_version = None
+
+
+def _rebuild(snapshot: CatalogSnapshot):
+    global _index, _index_version
+    _index = SearchIndex(snapshot.products)
+    _index_version = snapshot.version
+
+
+# Rebuild eagerly whenever the catalog cache loads a new version
+catalog.on_rebuild(_rebuild)
+
+
+def search_products(query: str, limit: int = 20) -> List[Dict]:
+    snapshot = catalog.get()
+    if snapshot.version != _index_version:
+        # Snapshot loaded before this module registered its listener
+        _rebuild(snapshot)
+    return _index.search(query, limit)
@@ -0,0 +1,209 @@
+"""Bulk User Provisioning
+Corporate wellness onboarding: create thousands of users in a few transactions
+"""
+
+import csv
+import io
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+from itertools import islice
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Set
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+import auth
+import models
+import schemas
+import workers
+
+BATCH_SIZE = int(os.getenv("PROVISION_BATCH_SIZE", 1000))
+
+_user_adapter = TypeAdapter(schemas.UserRegister)
+
+
+def _is_json(file: BinaryIO, filename: str) -> bool:
+    if filename.lower().endswith(".csv"):
+        return False
+    head = file.read(1024)
+    file.seek(0)
+    return head.decode("utf-8-sig", errors="ignore").lstrip().startswith("[")
+
+
+def iter_users(file: BinaryIO, filename: str = "") -> Iterator[schemas.UserRegister]:
+    """
+    Parse a CSV (header: email,password,first_name,last_name) or JSON array of users
+    from a seekable binary file. CSV rows are read and validated one at a time.
+
+    Raises:
+        ValueError: If the payload is not valid CSV/JSON or a row fails validation
+    """
+    file.seek(0)
+    is_json = _is_json(file, filename)
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        if is_json:
+            try:
+                rows = json.load(text)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON: {e}")
+            if not isinstance(rows, list):
+                raise ValueError("Invalid JSON: expected an array of users")
+        else:
+            rows = ({key: value or None for key, value in row.items()} for row in csv.DictReader(text))
+
+        for number, row in enumerate(rows, start=1):
+            try:
+                yield _user_adapter.validate_python(row)
+            except ValidationError as e:
+                raise ValueError(f"Invalid user row {number}: {e.errors()[:5]}")
+    except UnicodeDecodeError as e:
+        raise ValueError(f"Invalid encoding (expected UTF-8): {e}")
+    finally:
+        # Leave the caller's file open
+        text.detach()
+
+
+def _hash_passwords(passwords: List[str]) -> List[str]:
+    """Hash passwords with bcrypt across all cores (bcrypt is CPU-bound by design)."""
+    if workers.PROCESS_WORKERS <= 1 or len(passwords) < 2:
+        return [auth.get_password_hash(p) for p in passwords]
+
+    chunksize = max(1, len(passwords) // (workers.PROCESS_WORKERS * 4))
+    return list(workers.process_pool().map(auth.get_password_hash, passwords, chunksize=chunksize))
+
+
+def _batches(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def provision_users(db: Session, users: Iterable[schemas.UserRegister], tier: str = 'free') -> Dict:
+    """
+    Insert users and their profiles in batched single transactions.
+
+    `users` is consumed BATCH_SIZE rows at a time: each batch is checked against
+    existing accounts, hashed on the process pool and committed (users and profiles
+    together) before the next one is read.
+
+    Emails are normalized with auth.normalize_email. Emails that already exist
+    (in any letter case) or repeat within the payload are skipped.
+
+    Returns:
+        Summary with created/skipped counts and throughput
+    """
+    started = time.perf_counter()
+    received = 0
+    created = 0
+    hash_seconds = 0.0
+    seen: Set[str] = set()
+    now = datetime.utcnow()
+
+    for batch in _batches(users, BATCH_SIZE):
+        received += len(batch)
+
+        # Deduplicate within the payload, keeping the first occurrence
+        unique: Dict[str, schemas.UserRegister] = {}
+        for user in batch:
+            email = auth.normalize_email(user.email)
+            if email not in seen:
+                seen.add(email)
+                unique[email] = user
+
+        # Accounts stored before emails were normalized may differ only in case,
+        # which ON CONFLICT on the raw column would not catch
+        existing = set(db.execute(
+            select(func.lower(models.User.email)).where(func.lower(models.User.email).in_(list(unique)))
+        ).scalars())
+        pending = [(email, user) for email, user in unique.items() if email not in existing]
+        if not pending:
+            continue
+
+        hash_started = time.perf_counter()
+        hashed = _hash_passwords([user.password for _, user in pending])
+        hash_seconds += time.perf_counter() - hash_started
+
+        user_rows = [
+            {
+                'id': uuid.uuid4(),
+                'email': email,
+                'hashed_password': hashed_password,
+                'tier': tier,
+                'created_at': now,
+            }
+            for (email, _), hashed_password in zip(pending, hashed)
+        ]
+
+        inserted = db.execute(
+            insert(models.User)
+            .values(user_rows)
+            .on_conflict_do_nothing(index_elements=[models.User.email])
+            .returning(models.User.id, models.User.email)
+        ).all()
+
+        by_email = dict(pending)
+        profile_rows = [
+            {
+                'id': uuid.uuid4(),
+                'user_id': user_id,
+                'first_name': by_email[email].first_name,
+                'last_name': by_email[email].last_name,
+            }
+            for user_id, email in inserted
+        ]
+        if profile_rows:
+            db.execute(insert(models.UserProfile).values(profile_rows))
+
+        db.commit()
+        created += len(inserted)
+
+    elapsed = time.perf_counter() - started
+
+    return {
+        'received': received,
+        'created': created,
+        'skipped': received - created,
+        'hash_seconds': round(hash_seconds, 3),
+        'total_seconds': round(elapsed, 3),
+        'users_per_second': round(created / elapsed, 1) if elapsed else None,
+    }
+
+
+def provision_file(db: Session, file: BinaryIO, filename: str = "", tier: str = 'free') -> Dict:
+    """
+    Provision the users of a CSV/JSON file (see iter_users), streaming it twice:
+    every row is validated before the first one is inserted.
+
+    Raises:
+        ValueError: If the file is not valid CSV/JSON or a row fails validation
+    """
+    for _ in iter_users(file, filename):
+        pass
+    return provision_users(db, iter_users(file, filename), tier=tier)
+
+
+if __name__ == "__main__":
+    import sys
+
+    from database import SessionLocal
+
+    if len(sys.argv) < 2:
+        print("Usage: python provisioning.py <users.csv|users.json> [tier]")
+        sys.exit(1)
+
+    path = sys.argv[1]
+    session = SessionLocal()
+    try:
+        with open(path, "rb") as f:
+            summary = provision_file(session, f, path, tier=sys.argv[2] if len(sys.argv) > 2 else 'free')
+    finally:
+        session.close()
+
+    print(f"✅ Provisioned {summary['created']} users ({summary['skipped']} skipped) "
+          f"in {summary['total_seconds']}s — {summary['users_per_second']} users/s")
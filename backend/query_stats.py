@@ -0,0 +1,160 @@
+"""SQL Instrumentation
+Per-request query counts, DB time and N+1 detection via SQLAlchemy engine events
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# An identical statement repeated this many times in one request is flagged as N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", 5))
+
+_current_stats: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+# capture_all() blocks: see every query in the process, whichever thread/loop runs it
+_process_captures: List["QueryStats"] = []
+
+
+class QueryStats:
+    """Queries executed within one request (or one `capture()` block)."""
+
+    def __init__(self):
+        self.count = 0
+        self.db_seconds = 0.0
+        self.statements = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.db_seconds += seconds
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        """Statements executed at least `threshold` times (likely N+1 patterns)."""
+        return [(statement, n) for statement, n in self.statements.most_common() if n >= threshold]
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+    if context is not None:
+        context._query_timed = True
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_timed = False
+    _finish(conn, statement)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # after_cursor_execute doesn't run for a failed statement: pop its start time here, or
+    # it would stay on the pooled connection (and misalign the next query's timing)
+    context = exception_context.execution_context
+    if context is not None and getattr(context, "_query_timed", False):
+        context._query_timed = False
+        _finish(exception_context.connection, exception_context.statement)
+
+
+def _finish(conn, statement: str):
+    started_at = conn.info["query_started_at"].pop()
+    seconds = time.perf_counter() - started_at
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+    for stats in _process_captures:
+        stats.record(statement, seconds)
+
+
+@contextmanager
+def capture_all():
+    """
+    Collect stats for every query executed in this process while the block runs, e.g. requests
+    served by a TestClient (which runs the app on its own thread, outside the caller's context).
+    """
+    stats = QueryStats()
+    _process_captures.append(stats)
+    try:
+        yield stats
+    finally:
+        _process_captures.remove(stats)
+
+
+@contextmanager
+def capture():
+    """Collect stats for every query executed in the current context."""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+class RouteQueryRegistry:
+    """Aggregated per-route query stats for the metrics endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict] = {}
+
+    def observe(self, route: str, stats: QueryStats, n_plus_one: bool):
+        with self._lock:
+            entry = self._routes.setdefault(route, {
+                'requests': 0,
+                'queries': 0,
+                'db_seconds': 0.0,
+                'max_queries': 0,
+                'n_plus_one_requests': 0,
+            })
+            entry['requests'] += 1
+            entry['queries'] += stats.count
+            entry['db_seconds'] += stats.db_seconds
+            entry['max_queries'] = max(entry['max_queries'], stats.count)
+            entry['n_plus_one_requests'] += int(n_plus_one)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                route: {
+                    **entry,
+                    'db_seconds': round(entry['db_seconds'], 6),
+                    'avg_queries': round(entry['queries'] / entry['requests'], 2),
+                }
+                for route, entry in self._routes.items()
+            }
+
+
+registry = RouteQueryRegistry()
+
+
+async def sql_instrumentation_middleware(request, call_next):
+    """HTTP middleware: count queries per request and report them via Server-Timing."""
+    with capture() as stats:
+        response = await call_next(request)
+
+    # The router stores the matched route on the (shared) scope
+    route = request.scope.get("route")
+    route_name = f"{request.method} {route.path}" if route is not None else "unmatched"
+
+    repeated = stats.repeated()
+    if repeated:
+        statement, times = repeated[0]
+        logger.warning(f"Possible N+1 on {route_name}: statement executed {times}x: {statement[:200]}")
+    registry.observe(route_name, stats, n_plus_one=bool(repeated))
+
+    response.headers.append(
+        "Server-Timing",
+        f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.count} queries"',
+    )
+    return response
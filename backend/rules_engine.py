@@ -4,6 +4,7 @@ Cerveau n°1: Backend Rules Engine with Cross-Analysis
 
 from sqlalchemy.orm import Session
 import models
+import metrics
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import uuid
@@ -58,15 +59,16 @@ class WellnessEngine:
         """
         insights = []
         
-        # Fetch all user data
-        user_data = self._fetch_user_data(user_id)
-        
-        # Run analysis modules
-        insights.extend(self._analyze_sleep(user_data))
-        insights.extend(self._analyze_hydration(user_data))
-        insights.extend(self._analyze_stress(user_data))
-        insights.extend(self._analyze_activity(user_data))
-        insights.extend(self._cross_analyze(user_data))
+        with metrics.RULES_ENGINE_DURATION.time():
+            # Fetch all user data
+            user_data = self._fetch_user_data(user_id)
+            
+            # Run analysis modules
+            insights.extend(self._analyze_sleep(user_data))
+            insights.extend(self._analyze_hydration(user_data))
+            insights.extend(self._analyze_stress(user_data))
+            insights.extend(self._analyze_activity(user_data))
+            insights.extend(self._cross_analyze(user_data))
         
         # Convert to dictionaries and sort by priority
         insight_dicts = [insight.to_dict() for insight in insights]
@@ -135,7 +137,8 @@ class WellnessEngine:
         
         # Get magnesium product for recommendations
         magnesium = self.db.query(models.Product).filter(
-            models.Product.name.ilike('%magnesium%')
+            models.Product.name.ilike('%magnesium%'),
+            models.Product.deleted_at.is_(None)
         ).first()
         
         if avg_sleep < 6:
@@ -231,7 +234,8 @@ class WellnessEngine:
             
             # Get meditation cushion for recommendations
             meditation = self.db.query(models.Product).filter(
-                models.Product.name.ilike('%meditation%')
+                models.Product.name.ilike('%meditation%'),
+                models.Product.deleted_at.is_(None)
             ).first()
             
             if avg_stress > 7:
@@ -268,7 +272,8 @@ class WellnessEngine:
         
         # Get fitness products
         resistance_bands = self.db.query(models.Product).filter(
-            models.Product.name.ilike('%resistance%')
+            models.Product.name.ilike('%resistance%'),
+            models.Product.deleted_at.is_(None)
         ).first()
         
         if avg_steps < 5000:
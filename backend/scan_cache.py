@@ -0,0 +1,89 @@
+"""Scan Result Cache
+Recent scan results per user, matched on a perceptual hash so re-shots of the same plate/selfie hit
+"""
+
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+import metrics
+from image_preprocessing import PreprocessedImage
+
+SCAN_CACHE_TTL_SECONDS = float(os.getenv("SCAN_CACHE_TTL_SECONDS", 600))
+SCAN_CACHE_MAX_USERS = int(os.getenv("SCAN_CACHE_MAX_USERS", 10000))
+SCAN_CACHE_PER_USER = int(os.getenv("SCAN_CACHE_PER_USER", 8))
+# Max differing bits (of 64) for two images to count as the same scene
+SCAN_CACHE_MAX_DISTANCE = int(os.getenv("SCAN_CACHE_MAX_DISTANCE", 6))
+
+_LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def dhash(image: PreprocessedImage) -> int:
+    """
+    64-bit difference hash: grayscale, average down to 9x8, one bit per
+    left/right brightness comparison. Robust to re-encoding, small shifts and exposure.
+    """
+    gray = image.pixels @ _LUMA
+    small = np.array([
+        [block.mean() for block in np.array_split(band, 9, axis=1)]
+        for band in np.array_split(gray, 8, axis=0)
+    ])
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class ScanCache:
+    """
+    LRU over users, each holding their few most recent (hash, result) entries.
+    Results are never shared between users.
+    """
+
+    def __init__(self, max_users: int = SCAN_CACHE_MAX_USERS, per_user: int = SCAN_CACHE_PER_USER,
+                 ttl: float = SCAN_CACHE_TTL_SECONDS, max_distance: int = SCAN_CACHE_MAX_DISTANCE):
+        self.max_users = max_users
+        self.per_user = per_user
+        self.ttl = ttl
+        self.max_distance = max_distance
+        # (user_id, scan_type) -> [(fingerprint, expires_at, result), ...] newest last
+        self._entries: "OrderedDict[Tuple[str, str], List]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, scan_type: str, fingerprint: int) -> Optional[Any]:
+        key = (str(user_id), scan_type)
+        now = time.monotonic()
+        result = None
+        with self._lock:
+            entries = self._entries.get(key)
+            if entries:
+                entries[:] = [entry for entry in entries if entry[1] > now]
+                best = min(entries, key=lambda entry: hamming(entry[0], fingerprint), default=None)
+                if best is not None and hamming(best[0], fingerprint) <= self.max_distance:
+                    result = best[2]
+                    self._entries.move_to_end(key)
+
+        metrics.SCAN_CACHE_LOOKUPS.inc(scan_type=scan_type, result='hit' if result is not None else 'miss')
+        # Callers mutate results (timestamps), so hand out copies
+        return copy.deepcopy(result) if result is not None else None
+
+    def put(self, user_id, scan_type: str, fingerprint: int, result: Any):
+        key = (str(user_id), scan_type)
+        entry = (fingerprint, time.monotonic() + self.ttl, copy.deepcopy(result))
+        with self._lock:
+            entries = self._entries.setdefault(key, [])
+            entries.append(entry)
+            del entries[:-self.per_user]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+
+scan_cache = ScanCache()
@@ -0,0 +1,268 @@
+"""Asynchronous Scan Jobs
+Queued food/skin scans: workers claim pending FileScan rows, results are pushed with LISTEN/NOTIFY
+
+Run workers separately from the web processes and size them on their own:
+    python scan_jobs.py --concurrency 16
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+import inference
+import metrics
+import skin_history
+import storage
+import workers
+from database import ASYNC_DATABASE_URL, engine
+
+logger = logging.getLogger(__name__)
+
+SCAN_JOB_CONCURRENCY = int(os.getenv("SCAN_JOB_CONCURRENCY", 8))
+# Job loops to run inside each web process (0: jobs are left to `python scan_jobs.py`)
+SCAN_JOB_IN_PROCESS = int(os.getenv("SCAN_JOB_IN_PROCESS", 0))
+SCAN_JOB_POLL_SECONDS = float(os.getenv("SCAN_JOB_POLL_SECONDS", 0.5))
+# A job 'processing' for longer than this is assumed orphaned (worker died) and re-claimed
+SCAN_JOB_TIMEOUT_SECONDS = int(os.getenv("SCAN_JOB_TIMEOUT_SECONDS", 300))
+# A job claimed more often than this (it keeps killing or outliving its worker) is failed instead of retried
+SCAN_JOB_MAX_ATTEMPTS = int(os.getenv("SCAN_JOB_MAX_ATTEMPTS", 3))
+SCAN_EVENTS_CHANNEL = "scan_jobs"
+TERMINAL_STATUSES = ('done', 'failed')
+
+SCAN_TYPES = {'food_scan': 'food', 'skin_scan': 'skin'}
+
+_CLAIM_SQL = text("""
+    UPDATE file_scans SET status = 'processing', started_at = :now, attempts = attempts + 1
+    WHERE id = (
+        SELECT id FROM file_scans
+        WHERE status = 'pending'
+           OR (status = 'processing' AND started_at < :now - make_interval(secs => :timeout))
+        ORDER BY uploaded_at
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING id, user_id, file_type, storage_path, started_at, attempts
+""")
+
+# Only the claim that is still current completes the job: after a timeout the row may have been
+# re-claimed (new started_at) or finished by another worker
+_COMPLETE_SQL = text("""
+    UPDATE file_scans SET status = :status, result = CAST(:result AS jsonb), error = :error, completed_at = :now
+    WHERE id = :id AND status = 'processing' AND started_at = :started_at
+""")
+
+
+async def process_image(file_type: str, image, user_id) -> Dict:
+    """
+    Run recognition for one preprocessed image (scan cache, then batched inference).
+    Shared by the synchronous endpoints and the job workers.
+
+    Raises:
+        ValueError: If the image cannot be analysed (reported to the client as a 400 / failed job)
+    """
+    from scan_cache import dhash, scan_cache
+
+    scan_type = SCAN_TYPES[file_type]
+    fingerprint = await workers.run_cpu(dhash, image)
+    # Re-shots of the same plate/selfie reuse the user's recent result
+    analysis = scan_cache.get(user_id, scan_type, fingerprint)
+    if analysis is None:
+        if scan_type == 'food':
+            analysis = await inference.recognize_food(image)
+        else:
+            analysis = await inference.analyze_skin(image)
+        scan_cache.put(user_id, scan_type, fingerprint, analysis)
+
+    if scan_type == 'food':
+        import food_recognition
+        return {
+            'detected_foods': analysis,
+            'nutrition': food_recognition.food_ai.analyze_nutrition(analysis),
+            'timestamp': datetime.utcnow().isoformat(),
+        }
+
+    import skin_analysis
+    analysis['timestamp'] = datetime.utcnow().isoformat()
+    # SAFETY CHECK: Validate wellness-only metrics
+    skin_analysis.skin_ai.validate_wellness_only(analysis)
+    return {'analysis': analysis}
+
+
+# ============ WORKERS ============
+
+def claim_job():
+    with engine.begin() as connection:
+        return connection.execute(_CLAIM_SQL, {'now': datetime.utcnow(), 'timeout': SCAN_JOB_TIMEOUT_SECONDS}).first()
+
+
+def complete_job(job, result: Optional[Dict] = None, error: Optional[str] = None) -> bool:
+    """Store the outcome of a claimed job; False (and no side effects) if the claim was superseded."""
+    import orjson
+
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        completed = connection.execute(_COMPLETE_SQL, {
+            'id': job.id,
+            'status': 'failed' if error else 'done',
+            'result': orjson.dumps(result).decode() if result is not None else None,
+            'error': error,
+            'now': now,
+            'started_at': job.started_at,
+        }).rowcount
+        if not completed:
+            logger.warning(f"Scan job {job.id} was re-claimed or completed elsewhere; dropping this result")
+            return False
+        if result is not None and job.file_type == 'skin_scan':
+            skin_history.record(connection, job.user_id, job.id, result['analysis'], created_at=now)
+        # Delivered on commit to every web process streaming this scan
+        connection.execute(text("SELECT pg_notify(:channel, :id)"), {'channel': SCAN_EVENTS_CHANNEL, 'id': str(job.id)})
+    return True
+
+
+def _load_image(storage_key: str):
+    from image_preprocessing import preprocess
+
+    with storage.backend.open(storage_key) as blob:
+        return preprocess(blob)
+
+
+async def run_job(job):
+    scan_type = SCAN_TYPES.get(job.file_type)
+    if job.attempts > SCAN_JOB_MAX_ATTEMPTS:
+        logger.error(f"Scan job {job.id} failed after {job.attempts - 1} attempts")
+        await workers.run_io(complete_job, job, error="Scan processing failed")
+        return
+    try:
+        if scan_type is None:
+            raise ValueError(f"Unsupported scan type: {job.file_type}")
+        with metrics.SCAN_DURATION.time(scan_type=scan_type):
+            image = await workers.run_cpu(_load_image, job.storage_path)
+            result = await process_image(job.file_type, image, job.user_id)
+    except ValueError as e:
+        await workers.run_io(complete_job, job, error=str(e))
+    except Exception as e:
+        logger.error(f"Scan job {job.id} failed: {e}")
+        await workers.run_io(complete_job, job, error="Scan processing failed")
+    else:
+        await workers.run_io(complete_job, job, result=result)
+
+
+async def _job_loop():
+    while True:
+        try:
+            job = await workers.run_io(claim_job)
+        except Exception as e:
+            logger.error(f"Scan job claim failed: {e}")
+            job = None
+        if job is None:
+            await asyncio.sleep(SCAN_JOB_POLL_SECONDS)
+            continue
+        await run_job(job)
+
+
+_tasks: List[asyncio.Task] = []
+
+
+def start(concurrency: int = SCAN_JOB_IN_PROCESS):
+    loop = asyncio.get_running_loop()
+    while len(_tasks) < concurrency:
+        _tasks.append(loop.create_task(_job_loop()))
+
+
+async def stop():
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+
+
+# ============ COMPLETION EVENTS ============
+
+class ScanNotifier:
+    """
+    One LISTEN connection per web process; SSE handlers wait on per-scan events.
+    Without it (connection failure), waiters simply time out and re-check the row.
+    """
+
+    RETRY_SECONDS = 30
+
+    def __init__(self):
+        self._waiters: Dict[str, Set[asyncio.Event]] = {}
+        self._connection = None
+        self._retry_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _on_notify(self, connection, pid, channel, payload):
+        for event in self._waiters.get(payload, ()):
+            event.set()
+
+    async def _ensure_listening(self):
+        if self._connection is not None or time.monotonic() < self._retry_at:
+            return
+        async with self._lock:
+            if self._connection is not None:
+                return
+            try:
+                import asyncpg
+                dsn = make_url(ASYNC_DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+                connection = await asyncpg.connect(dsn)
+                await connection.add_listener(SCAN_EVENTS_CHANNEL, self._on_notify)
+                self._connection = connection
+            except Exception as e:
+                self._retry_at = time.monotonic() + self.RETRY_SECONDS
+                logger.warning(f"Scan event LISTEN unavailable, falling back to polling: {e}")
+
+    async def wait(self, scan_id: str, timeout: float) -> bool:
+        """Wait until `scan_id` is notified or `timeout` passes; True if notified."""
+        await self._ensure_listening()
+        event = asyncio.Event()
+        self._waiters.setdefault(scan_id, set()).add(event)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            waiters = self._waiters.get(scan_id)
+            waiters.discard(event)
+            if not waiters:
+                del self._waiters[scan_id]
+
+    async def close(self):
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+notifier = ScanNotifier()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Process queued food/skin scans")
+    parser.add_argument("--concurrency", type=int, default=SCAN_JOB_CONCURRENCY,
+                        help="Jobs processed at once by this process (inference is batched across them)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    async def main():
+        inference.start()
+        start(args.concurrency)
+        logger.info(f"Scan job worker running with concurrency {args.concurrency}")
+        try:
+            await asyncio.gather(*_tasks)
+        finally:
+            await stop()
+            await inference.stop()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
-from datetime import datetime
+from typing import Dict, Optional, List
+from datetime import date, datetime
 import uuid
 
 # User Schemas
@@ -28,6 +28,14 @@ class TokenResponse(BaseModel):
     token_type: str
     user: UserResponse
 
+class BulkProvisionResponse(BaseModel):
+    received: int
+    created: int
+    skipped: int
+    hash_seconds: float
+    total_seconds: float
+    users_per_second: Optional[float]
+
 # Health Log Schemas
 class HealthLogCreate(BaseModel):
     data_source: str
@@ -86,6 +94,30 @@ class ProductResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ProductPage(BaseModel):
+    items: List[ProductResponse]
+    next_cursor: Optional[str]
+    total: int
+    facets: Dict[str, int]  # category -> product count
+
+# Nutrition Schemas
+class ConfirmedFood(BaseModel):
+    food_id: Optional[int] = None   # nutrition database id (from the scan or type-ahead)
+    item: Optional[str] = None      # food name, used when food_id is absent
+    qty_g: float = Field(gt=0, le=5000)
+
+class DailyNutritionResponse(BaseModel):
+    day: date
+    calories: float
+    protein_g: float
+    carbs_g: float
+    fat_g: float
+    fiber_g: float
+    meal_count: int
+    
+    class Config:
+        from_attributes = True
+
 # Tier Update Schema
 class TierUpdate(BaseModel):
     new_tier: str  # 'connect' or 'baseline'
@@ -6,23 +6,20 @@ sys.path.append('/app/backend')
 
 from database import SessionLocal, init_db
 from models import Product
-import uuid
+from catalog_import import import_catalog
 
 def seed_products():
     """Seed the database with wellness products"""
     
-    # Initialize database tables
+    # Apply pending schema migrations
     init_db()
     
     db = SessionLocal()
     
     try:
-        # Clear existing products
-        db.query(Product).delete()
-        
         products = [
             # SLEEP Category
-            Product(
+            dict(
                 name="Magnesium Bisglycinate",
                 short_description="Premium magnesium for deep, restorative sleep",
                 description="Magnesium Bisglycinate is the gold standard for sleep support. This highly bioavailable form helps calm the nervous system, supports muscle relaxation, and promotes deep REM sleep without morning grogginess. We chose this specific form because it's gentle on digestion and delivers results you can feel from night one.",
@@ -32,7 +29,7 @@ def seed_products():
                 partner_url="https://example.com/magnesium-bisglycinate",
                 is_vetted=1
             ),
-            Product(
+            dict(
                 name="Organic Chamomile Tea Blend",
                 short_description="Soothing herbal blend for evening relaxation",
                 description="Our carefully curated chamomile blend combines organic chamomile flowers with lavender and passionflower for the ultimate bedtime ritual. This caffeine-free blend has been used for centuries to promote relaxation and prepare the body for restful sleep. Each ingredient is sourced from organic farms and tested for purity.",
@@ -42,7 +39,7 @@ def seed_products():
                 partner_url="https://example.com/chamomile-tea",
                 is_vetted=1
             ),
-            Product(
+            dict(
                 name="Weighted Silk Sleep Mask",
                 short_description="Luxurious blackout mask for uninterrupted sleep",
                 description="Experience total darkness with this premium weighted silk sleep mask. The gentle pressure provides a calming effect while the 100% mulberry silk is breathable and hypoallergenic. Perfect for travelers, shift workers, or anyone who values quality sleep in any environment.",
@@ -54,7 +51,7 @@ def seed_products():
             ),
             
             # ENERGY Category
-            Product(
+            dict(
                 name="Vitamin D3 + K2 Complex",
                 short_description="Sunshine vitamin for energy and immunity",
                 description="This synergistic combination of Vitamin D3 (5000 IU) and K2 (MK-7) supports energy production, immune function, and bone health. D3 is essential for mood and vitality, while K2 ensures proper calcium utilization. We selected this dosage based on the latest research for optimal wellness benefits.",
@@ -64,7 +61,7 @@ def seed_products():
                 partner_url="https://example.com/vitamin-d3-k2",
                 is_vetted=1
             ),
-            Product(
+            dict(
                 name="Organic Matcha Powder",
                 short_description="Premium Japanese matcha for sustained energy",
                 description="Ceremonial grade organic matcha from Uji, Japan. Unlike coffee, matcha provides 4-6 hours of clean, sustained energy thanks to L-theanine, which promotes calm focus without the jitters. Rich in antioxidants, this vibrant green powder supports metabolism and mental clarity throughout your day.",
@@ -74,7 +71,7 @@ def seed_products():
                 partner_url="https://example.com/matcha-powder",
                 is_vetted=1
             ),
-            Product(
+            dict(
                 name="B-Complex with Methylfolate",
                 short_description="Bioavailable B vitamins for energy metabolism",
                 description="Our comprehensive B-Complex features methylated forms for superior absorption, especially important for individuals with MTHFR gene variations. B vitamins are essential for converting food into cellular energy, supporting nervous system health, and maintaining mental clarity during demanding days.",
@@ -86,7 +83,7 @@ def seed_products():
             ),
             
             # SKIN Category
-            Product(
+            dict(
                 name="Collagen Peptides Serum",
                 short_description="Marine collagen for youthful, radiant skin",
                 description="This lightweight serum delivers bioactive marine collagen peptides directly to your skin. Clinical studies show visible improvements in skin elasticity, hydration, and fine lines within 4-8 weeks. We use sustainably sourced marine collagen for its smaller molecular size and superior absorption compared to bovine alternatives.",
@@ -96,7 +93,7 @@ def seed_products():
                 partner_url="https://example.com/collagen-serum",
                 is_vetted=1
             ),
-            Product(
+            dict(
                 name="Vitamin C Brightening Powder",
                 short_description="Pure L-ascorbic acid for glowing complexion",
                 description="Freshly activated vitamin C at its most potent. This pharmaceutical-grade L-ascorbic acid powder is mixed with your favorite serum or moisturizer for maximum efficacy. Vitamin C is the gold standard for brightening, protecting against environmental damage, and stimulating collagen production. Powder form ensures stability and potency.",
@@ -106,7 +103,7 @@ def seed_products():
                 partner_url="https://example.com/vitamin-c-powder",
                 is_vetted=1
             ),
-            Product(
+            dict(
                 name="Hyaluronic Acid Complex",
                 short_description="Multi-weight hydration for plump skin",
                 description="This advanced formula combines three molecular weights of hyaluronic acid to hydrate all skin layers. Low molecular weight penetrates deeply while high molecular weight creates a moisture-locking barrier on the surface. The result is visibly plumper, dewier skin that holds hydration for 24+ hours.",
@@ -118,7 +115,7 @@ def seed_products():
             ),
             
             # FITNESS Category
-            Product(
+            dict(
                 name="Organic Meditation Cushion",
                 short_description="Ergonomic zafu for comfortable practice",
                 description="Hand-crafted meditation cushion filled with organic buckwheat hulls for perfect support during sitting practice. The crescent shape promotes proper spinal alignment while the removable cover is machine washable. Whether you're new to meditation or a seasoned practitioner, proper support enhances focus and comfort.",
@@ -128,7 +125,7 @@ def seed_products():
                 partner_url="https://example.com/meditation-cushion",
                 is_vetted=1
             ),
-            Product(
+            dict(
                 name="Cork Yoga Blocks (Set of 2)",
                 short_description="Sustainable, sturdy support for your practice",
                 description="Made from sustainably harvested cork, these blocks provide stable support for yoga poses while being naturally antimicrobial and moisture-resistant. The firm yet forgiving surface improves form, prevents injury, and helps you access poses safely. Perfect for practitioners of all levels seeking to deepen their practice.",
@@ -138,7 +135,7 @@ def seed_products():
                 partner_url="https://example.com/yoga-blocks",
                 is_vetted=1
             ),
-            Product(
+            dict(
                 name="Plant-Based Protein Powder",
                 short_description="Complete amino acid profile for recovery",
                 description="Our organic blend combines pea, brown rice, and pumpkin seed proteins for a complete amino acid profile that rivals whey. Enhanced with digestive enzymes and naturally sweetened with monk fruit. Each serving delivers 25g of clean protein to support muscle recovery, satiety, and overall wellness goals.",
@@ -148,7 +145,7 @@ def seed_products():
                 partner_url="https://example.com/protein-powder",
                 is_vetted=1
             ),
-            Product(
+            dict(
                 name="Resistance Band Set",
                 short_description="Versatile bands for strength training anywhere",
                 description="This 5-band set (5-50 lbs resistance) includes door anchor, handles, and ankle straps for a complete home gym. Made from natural latex for durability and consistent resistance. Whether you're traveling, at home, or supplementing gym workouts, these bands enable full-body strength training and rehabilitation exercises.",
@@ -158,7 +155,7 @@ def seed_products():
                 partner_url="https://example.com/resistance-bands",
                 is_vetted=1
             ),
-            Product(
+            dict(
                 name="Foam Roller with Trigger Points",
                 short_description="Deep tissue massage for muscle recovery",
                 description="This high-density foam roller features strategically placed trigger points that mimic the hands of a massage therapist. Perfect for myofascial release, improving flexibility, and accelerating recovery after workouts. The durable EVA foam maintains its shape through thousands of uses while the textured surface penetrates deep into muscle tissue.",
@@ -170,18 +167,20 @@ def seed_products():
             ),
         ]
         
-        # Add all products to database
+        # Stable SKU: the partner URL slug, so re-seeding updates rows in place
         for product in products:
-            db.add(product)
+            product['sku'] = product['partner_url'].rsplit('/', 1)[-1]
         
-        db.commit()
-        print(f"✅ Successfully seeded {len(products)} products!")
+        # Upsert on SKU (keeps product ids) and soft-delete products no longer listed
+        summary = import_catalog(db, products)
+        print(f"✅ Successfully seeded {summary['upserted']} products ({summary['soft_deleted']} removed)!")
         
         # Print summary by category
-        categories = db.query(Product.category).distinct().all()
+        active = db.query(Product).filter(Product.deleted_at.is_(None))
+        categories = active.with_entities(Product.category).distinct().all()
         print("\n📊 Products by category:")
         for (category,) in categories:
-            count = db.query(Product).filter(Product.category == category).count()
+            count = active.filter(Product.category == category).count()
             print(f"   {category.capitalize()}: {count} products")
             
     except Exception as e:
@@ -1,34 +1,82 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, UploadFile, File
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query, Request, Response, status, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse, RedirectResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Optional
 import os
+import time
 import uuid
 import logging
-from pathlib import Path
 
-from database import get_db, init_db
+import orjson
+
+from database import AsyncSessionLocal, async_engine, get_db, get_async_db, init_db, get_pool_stats
+import database
 import models
 import schemas
 import auth
 import rules_engine
-import safety_filter
-import food_recognition
-import skin_analysis
+import hot_endpoints
+import sync_baseline
+from hot_endpoints import rows_response
+import provisioning
+import query_stats
+import metrics
+import http_cache
+import uploads
+import workers
+import storage
+import inference
+import scan_jobs
+import skin_history
+from catalog_cache import catalog
+import product_search
+from click_tracker import click_tracker, clicks_by_product
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize database
-init_db()
-logger.info("Database initialized successfully")
-
-# Create uploads directory
-UPLOADS_DIR = Path("/app/backend/uploads")
-UPLOADS_DIR.mkdir(exist_ok=True)
-
-app = FastAPI(title="Idunn Wellness API")
+# Schema is managed with Alembic (`alembic upgrade head`); opt in to migrating at boot
+RUN_MIGRATIONS_ON_STARTUP = os.getenv("RUN_MIGRATIONS_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+# Responses smaller than this are sent uncompressed (gzip overhead outweighs the savings)
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", 1024))
+# Scan event streams: keep-alive interval and maximum lifetime
+SCAN_SSE_HEARTBEAT_SECONDS = float(os.getenv("SCAN_SSE_HEARTBEAT_SECONDS", 15))
+SCAN_SSE_MAX_SECONDS = float(os.getenv("SCAN_SSE_MAX_SECONDS", 300))
+
+def warmup():
+    """Import the CV modules (PIL + model singletons) before the first scan request."""
+    import food_recognition  # noqa: F401
+    import skin_analysis  # noqa: F401
+    import image_preprocessing  # noqa: F401
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if RUN_MIGRATIONS_ON_STARTUP:
+        init_db()
+        logger.info("Database migrations applied")
+    
+    if WARMUP_ON_STARTUP:
+        warmup()
+        logger.info("CV modules warmed up")
+    
+    click_tracker.start()
+    inference.start()
+    scan_jobs.start()
+    yield
+    await scan_jobs.stop()
+    await scan_jobs.notifier.close()
+    await inference.stop()
+    await click_tracker.stop()
+    workers.shutdown()
+
+app = FastAPI(title="Idunn Wellness API", lifespan=lifespan)
 api_router = APIRouter(prefix="/api")
 
 # CORS middleware
@@ -40,20 +88,54 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+
+# Cap upload bodies while they are received (Content-Length or running byte count)
+app.add_middleware(uploads.UploadSizeLimitMiddleware)
+
+# SQL instrumentation: query count / DB time per request (Server-Timing header)
+app.middleware("http")(query_stats.sql_instrumentation_middleware)
+app.middleware("http")(metrics.metrics_middleware)
+
+# Read-your-writes marker for replica routing (see database.ReplicaRouter)
+app.middleware("http")(database.read_your_writes_middleware)
+
+def _pool_metric_lines():
+    pools = {"sync": get_pool_stats(), "async": get_pool_stats(async_engine.pool)}
+    lines = []
+    for key in ("checked_out", "checked_in", "overflow", "pool_size"):
+        lines.append(f"# TYPE idunn_db_pool_{key} gauge")
+        lines.extend(f'idunn_db_pool_{key}{{pool="{name}"}} {stats[key]}' for name, stats in pools.items())
+    lines.append("# TYPE idunn_db_pool_checkout_failures_total counter")
+    lines.extend(f'idunn_db_pool_checkout_failures_total{{pool="{name}"}} {stats["checkout_failures"]}' for name, stats in pools.items())
+    lines.append("# TYPE idunn_db_pool_wait_seconds_max gauge")
+    lines.extend(f'idunn_db_pool_wait_seconds_max{{pool="{name}"}} {stats["wait_seconds_max"]}' for name, stats in pools.items())
+    return lines
+
+metrics.register_collector(_pool_metric_lines)
+
+# Column-tuple list responses (see hot_endpoints.rows_response)
+CHAT_COLUMNS = (
+    models.ChatHistory.id,
+    models.ChatHistory.sender,
+    models.ChatHistory.message_text,
+    models.ChatHistory.timestamp,
+)
+
 # Medical trigger words for safety protocol
 # ============ AUTHENTICATION ENDPOINTS ============
 
 @api_router.post("/auth/register", response_model=schemas.TokenResponse)
 def register(user_data: schemas.UserRegister, db: Session = Depends(get_db)):
     # Check if user exists
-    existing_user = db.query(models.User).filter(models.User.email == user_data.email).first()
+    existing_user = db.query(models.User).filter(auth.email_matches(user_data.email)).first()
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create user
     hashed_password = auth.get_password_hash(user_data.password)
     new_user = models.User(
-        email=user_data.email,
+        email=auth.normalize_email(user_data.email),
         hashed_password=hashed_password,
         tier='free'
     )
@@ -82,7 +164,7 @@ def register(user_data: schemas.UserRegister, db: Session = Depends(get_db)):
 @api_router.post("/auth/login", response_model=schemas.TokenResponse)
 def login(user_data: schemas.UserLogin, db: Session = Depends(get_db)):
     # Find user
-    user = db.query(models.User).filter(models.User.email == user_data.email).first()
+    user = db.query(models.User).filter(auth.email_matches(user_data.email)).first()
     if not user or not auth.verify_password(user_data.password, user.hashed_password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
@@ -96,9 +178,39 @@ def login(user_data: schemas.UserLogin, db: Session = Depends(get_db)):
     }
 
 @api_router.get("/auth/me", response_model=schemas.UserResponse)
-def get_me(current_user: models.User = Depends(auth.get_current_user)):
+async def get_me(current_user: models.User = Depends(auth.get_current_user_async)):
     return current_user
 
+# ============ ADMIN ============
+
+@api_router.post("/admin/users/bulk", response_model=schemas.BulkProvisionResponse, dependencies=[Depends(auth.require_admin)])
+async def bulk_provision_users(
+    file: UploadFile = File(...),
+    tier: str = 'free',
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk-provision users for corporate onboarding from a CSV or JSON upload.
+    Existing emails are skipped, not overwritten.
+    """
+    if tier not in ['free', 'connect', 'baseline']:
+        raise HTTPException(status_code=400, detail="Invalid tier")
+    
+    # Capped at 20MB; the file stays in Starlette's spooled temp file and is read row by row
+    upload = await uploads.receive_upload(file, uploads.MAX_PROVISION_BYTES)
+    
+    try:
+        # Batches are hashed on the process pool; the I/O thread only waits on them and the DB
+        summary = await workers.run_io(provisioning.provision_file, db, upload.file, file.filename or "", tier)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        upload.close()
+    
+    logger.info(f"Bulk provisioning: {summary['created']} created, {summary['skipped']} skipped, {summary['users_per_second']} users/s")
+    
+    return summary
+
 # ============ TIER MANAGEMENT ============
 
 @api_router.post("/tier/upgrade")
@@ -114,46 +226,27 @@ def upgrade_tier(tier_data: schemas.TierUpdate, current_user: models.User = Depe
 # ============ HEALTH LOGGING ============
 
 @api_router.post("/v1/log", response_model=schemas.HealthLogResponse)
-def log_health_data(
+async def log_health_data(
     log_data: schemas.HealthLogCreate,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Validate metric types
-    valid_metrics = ['water_ml', 'sleep_hours', 'stress_level', 'steps', 'sleep_deep_seconds', 'heart_rate']
-    if log_data.metric_type not in valid_metrics:
-        raise HTTPException(status_code=400, detail="Invalid metric type")
-    
-    new_log = models.HealthLog(
-        user_id=current_user.id,
-        data_source=log_data.data_source,
-        metric_type=log_data.metric_type,
-        value=log_data.value
-    )
+    new_log = hot_endpoints.new_health_log(current_user.id, log_data)
     db.add(new_log)
-    db.commit()
-    db.refresh(new_log)
+    await db.commit()
+    await db.refresh(new_log)
     
     return new_log
 
 @api_router.get("/v1/logs", response_model=List[schemas.HealthLogResponse])
-def get_health_logs(
+async def get_health_logs(
     metric_type: str = None,
     days: int = 7,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(auth.get_user_async_read_db)
 ):
-    query = db.query(models.HealthLog).filter(models.HealthLog.user_id == current_user.id)
-    
-    if metric_type:
-        query = query.filter(models.HealthLog.metric_type == metric_type)
-    
-    # Filter by date range
-    start_date = datetime.utcnow() - timedelta(days=days)
-    query = query.filter(models.HealthLog.timestamp >= start_date)
-    
-    logs = query.order_by(models.HealthLog.timestamp.desc()).all()
-    return logs
+    result = await db.execute(hot_endpoints.health_logs_query(current_user.id, metric_type, days))
+    return rows_response(result.all())
 
 # ============ WEARABLE CONNECTIONS ============
 
@@ -276,127 +369,87 @@ async def upload_pdf(
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
     
-    # Save file
-    file_id = str(uuid.uuid4())
-    file_path = UPLOADS_DIR / f"{file_id}_{file.filename}"
-    
-    with open(file_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
+    # Save file (size-capped, stored by content hash)
+    upload = await uploads.receive_upload(file, uploads.MAX_PDF_BYTES)
+    try:
+        storage_key = await workers.run_io(storage.store, db, upload, '.pdf')
+    finally:
+        upload.close()
+    metrics.UPLOAD_BYTES.inc(upload.size, upload_type='blood_pdf')
     
     # Create file scan record
     file_scan = models.FileScan(
         user_id=current_user.id,
         file_type='blood_pdf',
-        storage_path=str(file_path)
+        storage_path=storage_key,
+        content_hash=upload.sha256
     )
     db.add(file_scan)
-    db.commit()
+    await workers.run_io(db.commit)
     
     return {"message": "File uploaded successfully", "file_id": str(file_scan.id), "filename": file.filename}
 
 # ============ AI CHAT ============
 
 @api_router.post("/v1/chat", response_model=List[schemas.ChatResponse])
-def chat(
+async def chat(
     message_data: schemas.ChatMessage,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Save user message
-    user_message = models.ChatHistory(
-        user_id=current_user.id,
-        sender='user',
-        message_text=message_data.message
-    )
+    user_message = hot_endpoints.user_chat_message(current_user.id, message_data.message)
     db.add(user_message)
-    db.commit()
-    db.refresh(user_message)
-    
-    # CRITICAL SAFETY PROTOCOL: Use enhanced safety filter
-    is_safe, safety_message = safety_filter.check_safety(message_data.message, language='en')
+    await db.commit()
+    await db.refresh(user_message)
     
-    if not is_safe:
-        # Return hard stop response
-        ai_message = models.ChatHistory(
-            user_id=current_user.id,
-            sender='ai',
-            message_text=safety_message
-        )
-        db.add(ai_message)
-        db.commit()
-        db.refresh(ai_message)
-        
-        logger.warning(f"Safety filter triggered for user {current_user.id}")
-        return [user_message, ai_message]
-    
-    # If no trigger words, generate wellness response (STUB)
-    # In production, this would call OpenAI API
-    wellness_response = "C'est une excellente question de bien-être! Voici mon conseil: Restez hydraté, dormez 7-9 heures, et bougez votre corps quotidiennement. Je suis là pour soutenir votre parcours de bien-être!"
-    
-    ai_message = models.ChatHistory(
-        user_id=current_user.id,
-        sender='ai',
-        message_text=wellness_response
-    )
+    ai_message = hot_endpoints.ai_chat_reply(current_user.id, message_data.message)
     db.add(ai_message)
-    db.commit()
-    db.refresh(ai_message)
+    await db.commit()
+    await db.refresh(ai_message)
     
     return [user_message, ai_message]
 
 @api_router.get("/v1/chat/history", response_model=List[schemas.ChatResponse])
 def get_chat_history(
+    request: Request,
     limit: int = 50,
     current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(auth.get_user_read_db)
 ):
-    history = db.query(models.ChatHistory).filter(
-        models.ChatHistory.user_id == current_user.id
-    ).order_by(models.ChatHistory.timestamp.desc()).limit(limit).all()
+    history = db.execute(
+        select(*CHAT_COLUMNS).where(
+            models.ChatHistory.user_id == current_user.id
+        ).order_by(models.ChatHistory.timestamp.desc()).limit(limit)
+    ).all()
     
-    return list(reversed(history))
+    return http_cache.conditional_response(request, rows_response(reversed(history)))
 
 # ============ DASHBOARD ============
 
 @api_router.get("/v1/dashboard", response_model=schemas.DashboardData)
-def get_dashboard(
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+async def get_dashboard(
+    request: Request,
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Get recent logs (last 7 days)
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    recent_logs = db.query(models.HealthLog).filter(
-        models.HealthLog.user_id == current_user.id,
-        models.HealthLog.timestamp >= seven_days_ago
-    ).order_by(models.HealthLog.timestamp.desc()).limit(20).all()
-    
-    # Get connected wearables
-    wearables = db.query(models.WearableConnection).filter(
-        models.WearableConnection.user_id == current_user.id,
-        models.WearableConnection.is_active == 1
-    ).all()
+    recent_logs = (await db.execute(hot_endpoints.recent_logs_query(current_user.id))).scalars().all()
+    wearables = (await db.execute(hot_endpoints.active_wearables_query(current_user.id))).scalars().all()
     
-    # Get insights from rules engine
-    sleep_insight = rules_engine.get_wellness_insight(str(current_user.id), db)
-    hydration_insight = rules_engine.get_hydration_insight(str(current_user.id), db)
+    # Get insights from rules engine (sync ORM code, run on the async connection via greenlet)
+    user_id = current_user.id
+    insights = await db.run_sync(lambda session: hot_endpoints.dashboard_insights(user_id, session))
     
-    return {
-        "user": current_user,
-        "recent_logs": recent_logs,
-        "connected_wearables": wearables,
-        "insights": {
-            "sleep": sleep_insight,
-            "hydration": hydration_insight
-        }
-    }
+    content = hot_endpoints.dashboard_json(current_user, recent_logs, wearables, insights)
+    response = Response(content=content, media_type="application/json")
+    return http_cache.conditional_response(request, response)
 
 # ============ INSIGHTS (WELLNESS BRAIN) ============
 
 @api_router.get("/v1/insights")
 def get_insights(
     current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(auth.get_user_read_db)
 ):
     """
     Get personalized wellness insights from the Wellness Brain (Cerveau n°1).
@@ -409,82 +462,139 @@ def get_insights(
 
 # ============ MARKETPLACE ============
 
+def catalog_response(request: Request, snapshot, content: bytes) -> Response:
+    response = Response(content=content, media_type="application/json")
+    return http_cache.conditional_response(request, response, etag=snapshot.etag, cache_control="public, no-cache")
+
 @api_router.get("/v1/products", response_model=List[schemas.ProductResponse])
-def get_all_products(db: Session = Depends(get_db)):
+def get_all_products(request: Request):
     """Get all products from the marketplace"""
-    products = db.query(models.Product).order_by(models.Product.created_at.desc()).all()
-    return products
+    snapshot = catalog.get()
+    return catalog_response(request, snapshot, snapshot.products_json)
+
+@api_router.get("/v1/products/browse", response_model=schemas.ProductPage)
+def browse_products(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str = None,
+    category: str = None,
+    min_price: float = None,
+    max_price: float = None,
+    vetted: bool = None
+):
+    """
+    Paginated, filtered product listing with per-category facet counts.
+    Pass `next_cursor` from the previous page as `cursor`.
+    """
+    snapshot = catalog.get()
+    try:
+        page = snapshot.page(
+            limit,
+            cursor=cursor,
+            category=category.lower() if category else None,
+            min_price=min_price,
+            max_price=max_price,
+            vetted=vetted
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ORJSONResponse(page)
+
+@api_router.get("/v1/products/search", response_model=List[schemas.ProductResponse])
+def search_products(q: str = Query(..., min_length=1, max_length=200), limit: int = Query(20, ge=1, le=100)):
+    """Full-text product search (BM25 over name and descriptions, accent-insensitive, prefix type-ahead)"""
+    return ORJSONResponse(product_search.search_products(q, limit))
 
 @api_router.get("/v1/products/category/{category_name}", response_model=List[schemas.ProductResponse])
-def get_products_by_category(category_name: str, db: Session = Depends(get_db)):
+def get_products_by_category(category_name: str, request: Request):
     """Get products filtered by category"""
-    products = db.query(models.Product).filter(
-        models.Product.category == category_name.lower()
-    ).order_by(models.Product.created_at.desc()).all()
-    return products
+    snapshot = catalog.get()
+    return catalog_response(request, snapshot, snapshot.category_json.get(category_name.lower(), b"[]"))
 
 @api_router.get("/v1/product/{product_id}", response_model=schemas.ProductResponse)
-def get_product_by_id(product_id: str, db: Session = Depends(get_db)):
+def get_product_by_id(product_id: str, request: Request):
     """Get a single product by ID"""
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
-    if not product:
+    snapshot = catalog.get()
+    try:
+        content = snapshot.product_json.get(str(uuid.UUID(product_id)))
+    except ValueError:
+        content = None
+    if content is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return catalog_response(request, snapshot, content)
+
+@api_router.get("/v1/product/{product_id}/click")
+def product_click(product_id: str, user_id: Optional[uuid.UUID] = Depends(auth.get_optional_user_id)):
+    """
+    Affiliate click-through: record the click (with the user, if signed in) and redirect to the partner page.
+    The click is buffered in memory and written to product_clicks in batches.
+    """
+    snapshot = catalog.get()
+    try:
+        product = snapshot.by_id.get(str(uuid.UUID(product_id)))
+    except ValueError:
+        product = None
+    if product is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    
+    click_tracker.record(product['id'], user_id)
+    return RedirectResponse(product['partner_url'], status_code=status.HTTP_302_FOUND)
 
 # Legacy endpoint for backwards compatibility
 @api_router.get("/v1/marketplace", response_model=List[schemas.ProductResponse])
-def get_marketplace_products(db: Session = Depends(get_db)):
+def get_marketplace_products(request: Request):
     """Legacy marketplace endpoint - redirects to /v1/products"""
-    return get_all_products(db)
+    return get_all_products(request)
 
 # ============ COMPUTER VISION SCANNERS ============
 
 @api_router.post("/v1/scan/food")
 async def scan_food(
     file: UploadFile = File(...),
+    mode: str = Query("sync", pattern="^(sync|async)$"),
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Food Scanner: Recognize food items from image using CV.
     Returns detected food items with quantities and calories.
+    With mode=async, returns 202 and a scan id right after storing the image;
+    fetch the result from /v1/scans/{scan_id} or its /events stream.
     """
+    import image_preprocessing
+    
+    # Image is capped at 10MB (body limit enforced while receiving, exact file size here)
+    upload = await uploads.receive_upload(file, uploads.MAX_IMAGE_BYTES)
+    
     try:
-        # Read image data
-        image_data = await file.read()
-        
-        # Validate image size (max 10MB)
-        if len(image_data) > 10 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="Image too large (max 10MB)")
-        
-        # Run AI recognition
-        detected_foods = food_recognition.food_ai.recognize_food(image_data)
+        metrics.UPLOAD_BYTES.inc(upload.size, upload_type='food_scan')
         
-        # Analyze nutrition
-        nutrition_analysis = food_recognition.food_ai.analyze_nutrition(detected_foods)
+        if mode == 'async':
+            return await enqueue_scan(upload, 'food_scan', current_user, db)
         
-        # Save to FileScan for history
-        scan_id = str(uuid.uuid4())
-        file_path = UPLOADS_DIR / f"{scan_id}_food_scan.jpg"
+        with metrics.SCAN_DURATION.time(scan_type='food'):
+            # Decode off the event loop, then batch inference in the model workers
+            image = await workers.run_cpu(image_preprocessing.preprocess, upload.open())
+            result = await scan_jobs.process_image('food_scan', image, current_user.id)
         
-        with open(file_path, "wb") as f:
-            f.write(image_data)
+        # Save to FileScan for history (content-addressed; repeat photos share a blob)
+        storage_key = await workers.run_io(storage.store, db, upload, '.jpg')
         
         file_scan = models.FileScan(
             user_id=current_user.id,
             file_type='food_scan',
-            storage_path=str(file_path)
+            storage_path=storage_key,
+            content_hash=upload.sha256,
+            result=result,
+            completed_at=datetime.utcnow()
         )
         db.add(file_scan)
-        db.commit()
+        await workers.run_io(db.commit)
         
-        logger.info(f"Food scan completed for user {current_user.id}: {len(detected_foods)} items detected")
+        logger.info(f"Food scan completed for user {current_user.id}: {len(result['detected_foods'])} items detected")
         
         return {
             "scan_id": str(file_scan.id),
-            "detected_foods": detected_foods,
-            "nutrition": nutrition_analysis,
-            "timestamp": datetime.utcnow().isoformat(),
+            **result,
             "note": "STUB: Using simulated AI. In production, integrate LogMeal.ai, Clarifai, or custom model."
         }
         
@@ -493,18 +603,37 @@ async def scan_food(
     except Exception as e:
         logger.error(f"Food scan error: {e}")
         raise HTTPException(status_code=500, detail="Food recognition failed")
+    finally:
+        upload.close()
+
+@api_router.get("/v1/foods/search")
+def search_foods(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50)):
+    """Type-ahead over the nutrition database (name or word prefix) for editing scan results."""
+    from nutrition_db import nutrition_db
+    return ORJSONResponse(nutrition_db.search_prefix(q, limit))
+
+@api_router.get("/v1/foods/{food_id}")
+def get_food(food_id: int):
+    from nutrition_db import nutrition_db
+    food = nutrition_db.get(food_id)
+    if food is None:
+        raise HTTPException(status_code=404, detail="Food not found")
+    return ORJSONResponse(food)
 
 @api_router.post("/v1/scan/food/confirm")
 def confirm_food_scan(
     scan_id: str,
-    confirmed_foods: List[Dict],
+    confirmed_foods: List[schemas.ConfirmedFood],
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Confirm and save food scan results to HealthLog.
-    User can edit detected items before confirmation.
+    Confirm and save food scan results as a meal.
+    User can edit detected items before confirmation; items are validated
+    against the nutrition database and calories/macros computed server-side.
     """
+    import meal_logging
+    
     try:
         # Validate scan exists
         scan = db.query(models.FileScan).filter(
@@ -515,48 +644,45 @@ def confirm_food_scan(
         if not scan:
             raise HTTPException(status_code=404, detail="Scan not found")
         
-        # Save each food item as a health log entry
-        total_calories = 0
-        for food in confirmed_foods:
-            # Create health log for this food item
-            health_log = models.HealthLog(
-                user_id=current_user.id,
-                data_source='food_scanner',
-                metric_type='food_intake',
-                value=food.get('qty_g', 0),
-                timestamp=datetime.utcnow()
-            )
-            db.add(health_log)
-            total_calories += food.get('calories', 0)
-        
-        # Also log total calories
-        calorie_log = models.HealthLog(
-            user_id=current_user.id,
-            data_source='food_scanner',
-            metric_type='calories',
-            value=total_calories,
-            timestamp=datetime.utcnow()
+        meal = meal_logging.log_meal(
+            db, current_user.id, [food.model_dump() for food in confirmed_foods], scan_id=scan.id
         )
-        db.add(calorie_log)
-        
-        db.commit()
         
-        logger.info(f"Food scan confirmed for user {current_user.id}: {len(confirmed_foods)} items, {total_calories} cal")
+        logger.info(f"Food scan confirmed for user {current_user.id}: {meal['items_logged']} items, {meal['calories']} cal")
         
         return {
             "message": "Food intake logged successfully",
-            "items_logged": len(confirmed_foods),
-            "total_calories": total_calories
+            **meal,
+            "total_calories": meal['calories']
         }
         
+    except HTTPException:
+        raise
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         logger.error(f"Food confirmation error: {e}")
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to log food intake")
 
+@api_router.get("/v1/nutrition/daily", response_model=List[schemas.DailyNutritionResponse])
+def get_daily_nutrition(
+    days: int = Query(7, ge=1, le=366),
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(auth.get_user_read_db)
+):
+    """Per-day calorie and macro totals (most recent first), maintained as meals are logged."""
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    return db.query(models.DailyNutrition).filter(
+        models.DailyNutrition.user_id == current_user.id,
+        models.DailyNutrition.day >= since
+    ).order_by(models.DailyNutrition.day.desc()).all()
+
 @api_router.post("/v1/scan/skin")
 async def scan_skin(
     file: UploadFile = File(...),
+    mode: str = Query("sync", pattern="^(sync|async)$"),
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -564,42 +690,42 @@ async def scan_skin(
     Skin Scanner: Analyze skin wellness metrics (NOT medical diagnosis).
     Returns hydration, pore visibility, fine lines, etc.
     CRITICAL: Wellness-only metrics, no medical conditions.
+    With mode=async, returns 202 and a scan id (see scan_food).
     """
+    import image_preprocessing
+    
+    # Image is capped at 10MB (body limit enforced while receiving, exact file size here)
+    upload = await uploads.receive_upload(file, uploads.MAX_IMAGE_BYTES)
+    
     try:
-        # Read image data
-        image_data = await file.read()
-        
-        # Validate image size (max 10MB)
-        if len(image_data) > 10 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="Image too large (max 10MB)")
+        metrics.UPLOAD_BYTES.inc(upload.size, upload_type='skin_scan')
         
-        # Run AI analysis
-        skin_analysis_result = skin_analysis.skin_ai.analyze_skin(image_data)
-        skin_analysis_result['timestamp'] = datetime.utcnow().isoformat()
+        if mode == 'async':
+            return await enqueue_scan(upload, 'skin_scan', current_user, db)
         
-        # SAFETY CHECK: Validate wellness-only metrics
-        skin_analysis.skin_ai.validate_wellness_only(skin_analysis_result)
+        # Run AI analysis (includes the wellness-only safety check)
+        with metrics.SCAN_DURATION.time(scan_type='skin'):
+            image = await workers.run_cpu(image_preprocessing.preprocess, upload.open())
+            result = await scan_jobs.process_image('skin_scan', image, current_user.id)
         
-        # Save to FileScan for history
-        scan_id = str(uuid.uuid4())
-        file_path = UPLOADS_DIR / f"{scan_id}_skin_scan.jpg"
-        
-        with open(file_path, "wb") as f:
-            f.write(image_data)
+        # Save to FileScan for history (content-addressed; repeat photos share a blob)
+        storage_key = await workers.run_io(storage.store, db, upload, '.jpg')
         
         file_scan = models.FileScan(
             user_id=current_user.id,
             file_type='skin_scan',
-            storage_path=str(file_path)
+            storage_path=storage_key,
+            content_hash=upload.sha256,
+            result=result,
+            completed_at=datetime.utcnow()
         )
-        db.add(file_scan)
-        db.commit()
+        await workers.run_io(commit_skin_scan, db, file_scan, result['analysis'])
         
         logger.info(f"Skin scan completed for user {current_user.id}")
         
         return {
             "scan_id": str(file_scan.id),
-            "analysis": skin_analysis_result,
+            **result,
             "note": "STUB: Using simulated AI. In production, integrate Haut.ai, Perfect Corp, or custom model."
         }
         
@@ -608,14 +734,189 @@ async def scan_skin(
     except Exception as e:
         logger.error(f"Skin scan error: {e}")
         raise HTTPException(status_code=500, detail="Skin analysis failed")
+    finally:
+        upload.close()
+
+def commit_skin_scan(db: Session, file_scan: models.FileScan, analysis: Dict):
+    """Insert the scan row and its skin_analyses row in one transaction."""
+    db.add(file_scan)
+    db.flush()
+    skin_history.record(db, file_scan.user_id, file_scan.id, analysis, created_at=file_scan.completed_at)
+    db.commit()
+
+async def enqueue_scan(upload, file_type: str, current_user: models.User, db: Session):
+    """Store the image and queue a pending FileScan for the scan job workers."""
+    storage_key = await workers.run_io(storage.store, db, upload, '.jpg')
+    
+    file_scan = models.FileScan(
+        user_id=current_user.id,
+        file_type=file_type,
+        storage_path=storage_key,
+        content_hash=upload.sha256,
+        status='pending'
+    )
+    db.add(file_scan)
+    await workers.run_io(db.commit)
+    
+    scan_id = str(file_scan.id)
+    return ORJSONResponse(status_code=status.HTTP_202_ACCEPTED, content={
+        "scan_id": scan_id,
+        "status": "pending",
+        "poll_url": f"/api/v1/scans/{scan_id}",
+        "events_url": f"/api/v1/scans/{scan_id}/events",
+    })
+
+SCAN_STATUS_COLUMNS = (
+    models.FileScan.id.label('scan_id'),
+    models.FileScan.file_type,
+    models.FileScan.status,
+    models.FileScan.result,
+    models.FileScan.error,
+    models.FileScan.uploaded_at,
+    models.FileScan.completed_at,
+)
+
+async def fetch_scan_status(scan_id: str, user_id) -> Optional[Dict]:
+    try:
+        scan_uuid = uuid.UUID(scan_id)
+    except ValueError:
+        return None
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(
+            select(*SCAN_STATUS_COLUMNS).where(models.FileScan.id == scan_uuid, models.FileScan.user_id == user_id)
+        )).first()
+    return dict(row._mapping) if row else None
+
+@api_router.get("/v1/scans/{scan_id}")
+async def get_scan(scan_id: str, current_user: models.User = Depends(auth.get_current_user_async)):
+    """Poll a scan: status is pending, processing, done or failed."""
+    scan = await fetch_scan_status(scan_id, current_user.id)
+    if scan is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    return ORJSONResponse(scan)
+
+@api_router.get("/v1/scans/{scan_id}/events")
+async def scan_events(scan_id: str, current_user: models.User = Depends(auth.get_current_user_async)):
+    """
+    Server-sent events for one scan: a `status` event on every change, ending with
+    the done/failed event carrying the result. Comment lines keep idle proxies open.
+    """
+    scan = await fetch_scan_status(scan_id, current_user.id)
+    if scan is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    
+    async def stream():
+        current, last_status = scan, None
+        deadline = time.monotonic() + SCAN_SSE_MAX_SECONDS
+        while True:
+            if current['status'] != last_status:
+                last_status = current['status']
+                yield b"event: status\ndata: " + orjson.dumps(current) + b"\n\n"
+            if last_status in scan_jobs.TERMINAL_STATUSES or time.monotonic() > deadline:
+                return
+            if not await scan_jobs.notifier.wait(str(current['scan_id']), SCAN_SSE_HEARTBEAT_SECONDS):
+                yield b": keep-alive\n\n"
+            current = await fetch_scan_status(scan_id, current_user.id)
+            if current is None:
+                return
+    
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+        # Marks the body as already encoded so GZipMiddleware passes events through unbuffered
+        "Content-Encoding": "identity",
+    })
+
+@api_router.get("/v1/skin/history")
+async def get_skin_history(
+    limit: int = Query(30, ge=1, le=200),
+    before: Optional[datetime] = None,
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(auth.get_user_async_read_db)
+):
+    """
+    Past skin analyses, newest first, with the score change vs the previous scan.
+    Page with before=<created_at of the last item>. Served from skin_analyses; no images are read.
+    """
+    query = select(*skin_history.SKIN_HISTORY_COLUMNS).where(models.SkinAnalysis.user_id == current_user.id)
+    if before is not None:
+        query = query.where(models.SkinAnalysis.created_at < before)
+    
+    result = await db.execute(query.order_by(models.SkinAnalysis.created_at.desc()).limit(limit))
+    return ORJSONResponse([skin_history.decode(row) for row in result.all()])
+
+@api_router.get("/v1/skin/trend")
+async def get_skin_trend(
+    days: int = Query(90, ge=1, le=730),
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(auth.get_user_async_read_db)
+):
+    """Score series over `days` (oldest first) with the net score and per-metric level changes."""
+    since = datetime.utcnow() - timedelta(days=days)
+    result = await db.execute(
+        select(
+            models.SkinAnalysis.created_at,
+            models.SkinAnalysis.overall_score,
+            models.SkinAnalysis.score_delta,
+            *(getattr(models.SkinAnalysis, metric) for metric in skin_history.METRIC_LEVELS),
+        ).where(
+            models.SkinAnalysis.user_id == current_user.id,
+            models.SkinAnalysis.created_at >= since
+        ).order_by(models.SkinAnalysis.created_at)
+    )
+    return ORJSONResponse(skin_history.trend(result.all()))
+
+@api_router.delete("/v1/scans/{scan_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_scan(
+    scan_id: str,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Delete an upload record; the stored blob goes once nothing else references it."""
+    scan = db.query(models.FileScan).filter(
+        models.FileScan.id == scan_id,
+        models.FileScan.user_id == current_user.id
+    ).first()
+    if not scan:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    
+    storage.release(db, scan)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 # Health check
 @api_router.get("/health")
 def health_check():
     return {"status": "healthy", "service": "Idunn Wellness API"}
 
+@api_router.get("/health/db")
+def db_pool_health():
+    """Connection pool usage for this worker process (sync threadpool handlers and async handlers)."""
+    return {"pool": get_pool_stats(), "async_pool": get_pool_stats(async_engine.pool)}
+
+@api_router.get("/admin/clicks", dependencies=[Depends(auth.require_admin)])
+def click_stats(db: Session = Depends(get_db)):
+    """
+    Clicks per product from product_clicks (all workers; clicks still buffered are not counted yet)
+    and this worker's buffer status.
+    """
+    stats = click_tracker.stats()
+    stats['clicks_by_product'] = clicks_by_product(db)
+    return stats
+
+@api_router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus text exposition of this worker's request, scan and DB pool metrics."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@api_router.get("/metrics/sql")
+def sql_metrics():
+    """Per-route query counts, DB time and N+1 flags for this worker process."""
+    return {"routes": query_stats.registry.snapshot(), "n_plus_one_threshold": query_stats.N_PLUS_ONE_THRESHOLD}
+
 # Include router
 app.include_router(api_router)
+if sync_baseline.BENCHMARK_SYNC_ROUTES:
+    app.include_router(sync_baseline.router)
 
 if __name__ == "__main__":
     import uvicorn
@@ -4,11 +4,11 @@ Stub implementation ready for integration with real CV APIs
 """
 
 import base64
-import io
-from PIL import Image
-from typing import Dict
+from typing import BinaryIO, Dict, Union
 import random
 
+from image_preprocessing import PreprocessedImage, preprocess
+
 class SkinAnalysisAI:
     """
     Skin wellness analysis using Computer Vision.
@@ -38,12 +38,13 @@ class SkinAnalysisAI:
         # or self.api_key = os.getenv('SKIN_ANALYSIS_API_KEY')
         pass
     
-    def analyze_skin(self, image_data: bytes) -> Dict:
+    def analyze_skin(self, image_data: Union[bytes, BinaryIO, PreprocessedImage]) -> Dict:
         """
         Analyze skin wellness metrics from facial image.
         
         Args:
-            image_data: Raw image bytes from front-facing camera
+            image_data: Raw image bytes (or binary file object, or preprocessed image)
+                from front-facing camera
             
         Returns:
             Dictionary of wellness metrics (NO medical diagnosis)
@@ -56,19 +57,18 @@ class SkinAnalysisAI:
         - OpenAI Vision with strict wellness prompts
         """
         
-        # Validate image
-        try:
-            img = Image.open(io.BytesIO(image_data))
-            width, height = img.size
-            
-            # Basic face detection validation (in production, use proper face detection)
-            if width < 200 or height < 200:
-                raise ValueError("Image too small for analysis")
-        except Exception as e:
-            raise ValueError(f"Invalid image data: {e}")
+        # Decode once at model resolution (raises ValueError on invalid images)
+        image = preprocess(image_data)
+        
+        # Basic face detection validation (in production, use proper face detection)
+        width, height = image.original_size
+        if width < 200 or height < 200:
+            raise ValueError("Invalid image data: Image too small for analysis")
         
         # STUB: Simulate AI analysis
         # In production, this would be:
+        # results = self.model.predict(image.normalized()[None])
+        # or
         # response = requests.post('https://api.haut.ai/analyze',
         #                         files={'image': image_data},
         #                         headers={'Authorization': f'Bearer {api_key}'})
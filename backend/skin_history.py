@@ -0,0 +1,101 @@
+"""Skin Analysis History
+Analyses are stored as small-int coded metrics with the score delta to the previous scan precomputed
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert, select
+
+import models
+
+# Stored code = index in the tuple (ordered worst/lowest -> best/highest where that applies).
+# Must match the values produced by skin_analysis.SkinAnalysisAI; append only, never reorder.
+METRIC_LEVELS = {
+    'hydration_level': ('low', 'medium', 'high'),
+    'pore_visibility': ('minimal', 'visible', 'prominent'),
+    'fine_lines': ('minimal', 'moderate', 'visible'),
+    'skin_tone': ('even', 'slightly_uneven'),
+    'radiance': ('dull', 'normal', 'radiant'),
+    'texture': ('smooth', 'normal', 'rough'),
+}
+_CODES = {metric: {label: code for code, label in enumerate(levels)} for metric, levels in METRIC_LEVELS.items()}
+
+SKIN_HISTORY_COLUMNS = (
+    models.SkinAnalysis.id,
+    models.SkinAnalysis.scan_id,
+    models.SkinAnalysis.created_at,
+    models.SkinAnalysis.overall_score,
+    models.SkinAnalysis.score_delta,
+    *(getattr(models.SkinAnalysis, metric) for metric in METRIC_LEVELS),
+    models.SkinAnalysis.recommendations,
+)
+
+
+def encode(analysis: Dict) -> Dict:
+    """Analysis dict (as returned by analyze_skin) -> skin_analyses column values."""
+    return {
+        **{metric: _CODES[metric].get(analysis.get(metric)) for metric in METRIC_LEVELS},
+        'overall_score': int(analysis['overall_score']),
+        'recommendations': analysis.get('recommendations'),
+    }
+
+
+def decode(row) -> Dict:
+    """skin_analyses row (SKIN_HISTORY_COLUMNS) -> API dict with metric labels."""
+    values = dict(row._mapping)
+    metrics = {}
+    for metric, levels in METRIC_LEVELS.items():
+        code = values.pop(metric)
+        metrics[metric] = levels[code] if code is not None and code < len(levels) else None
+    values['metrics'] = metrics
+    return values
+
+
+def record(db, user_id, scan_id, analysis: Dict, created_at: Optional[datetime] = None):
+    """
+    Insert one analysis in the caller's transaction (Session or Connection).
+    score_delta is computed by the INSERT itself from the user's latest row.
+    """
+    values = encode(analysis)
+    previous_score = (
+        select(models.SkinAnalysis.overall_score)
+        .where(models.SkinAnalysis.user_id == user_id)
+        .order_by(models.SkinAnalysis.created_at.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    db.execute(insert(models.SkinAnalysis).values(
+        id=models.uuid7(),
+        user_id=user_id,
+        scan_id=scan_id,
+        created_at=created_at or datetime.utcnow(),
+        score_delta=values['overall_score'] - previous_score,
+        **values,
+    ))
+
+
+def trend(rows: List) -> Dict:
+    """
+    Summarize score points (oldest first): net score change and, per metric,
+    how many levels it moved between the first and latest scan.
+    """
+    points = [
+        {'created_at': row.created_at, 'overall_score': row.overall_score, 'score_delta': row.score_delta}
+        for row in rows
+    ]
+    if not rows:
+        return {'points': points, 'scans': 0, 'score_change': None, 'metric_changes': {}}
+
+    first, latest = rows[0], rows[-1]
+    metric_changes = {}
+    for metric in METRIC_LEVELS:
+        start, end = getattr(first, metric), getattr(latest, metric)
+        metric_changes[metric] = (end - start) if start is not None and end is not None else None
+
+    return {
+        'points': points,
+        'scans': len(rows),
+        'score_change': latest.overall_score - first.overall_score,
+        'metric_changes': metric_changes,
+    }
@@ -0,0 +1,184 @@
+"""Content-Addressed Blob Storage
+Uploads are named by SHA-256, sharded into nested prefixes and stored once per distinct content
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+import metrics
+import models
+
+logger = logging.getLogger(__name__)
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").lower()  # 'local' or 's3'
+UPLOADS_DIR = Path(os.getenv("UPLOADS_DIR", "/app/backend/uploads"))
+# Two levels of 2-hex-char prefixes: 65,536 leaf directories
+SHARD_DEPTH = int(os.getenv("STORAGE_SHARD_DEPTH", 2))
+SHARD_WIDTH = 2
+S3_BUCKET = os.getenv("S3_BUCKET", "idunn-uploads")
+# Set for MinIO / other S3-compatible stores, e.g. http://localhost:9000
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+S3_REGION = os.getenv("S3_REGION")
+COPY_CHUNK_SIZE = 64 * 1024
+
+
+def blob_key(sha256: str, suffix: str = "") -> str:
+    """'9f86d08…' -> '9f/86/9f86d08….jpg'"""
+    shards = [sha256[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(SHARD_DEPTH)]
+    return "/".join(shards + [f"{sha256}{suffix}"])
+
+
+class StorageBackend(ABC):
+    """Blob store keyed by content address. Keys are immutable once written."""
+
+    @abstractmethod
+    def put(self, key: str, source: BinaryIO) -> bool:
+        """Store `source` under `key`; returns False if the blob already existed."""
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Open a stored blob for reading."""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Remove a blob; missing keys are ignored."""
+
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path(self, key: str) -> Path:
+        # Legacy rows store an absolute path, which `/` returns unchanged
+        return self.root / key
+
+    def put(self, key: str, source: BinaryIO) -> bool:
+        path = self.path(key)
+        if path.exists():
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temp file in the same directory, then rename over the final
+        # name: readers never see a partial blob, and concurrent writers of the
+        # same content just replace it with identical bytes
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                shutil.copyfileobj(source, tmp, COPY_CHUNK_SIZE)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            os.replace(tmp_name, path)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+        return True
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self.path(key), "rb")
+
+    def delete(self, key: str):
+        try:
+            self.path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+
+class S3Storage(StorageBackend):
+    """S3 or any S3-compatible store (MinIO locally). PUTs are atomic per object."""
+
+    def __init__(self, bucket: str, endpoint_url: str = None, region: str = None):
+        import boto3
+        from botocore.exceptions import ClientError
+
+        self.bucket = bucket
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+        self._client_error = ClientError
+
+    def _exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except self._client_error as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put(self, key: str, source: BinaryIO) -> bool:
+        if self._exists(key):
+            return False
+        self.client.upload_fileobj(source, self.bucket, key)
+        return True
+
+    def open(self, key: str) -> BinaryIO:
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"]
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+
+def _create_backend() -> StorageBackend:
+    if STORAGE_BACKEND == "s3":
+        return S3Storage(S3_BUCKET, S3_ENDPOINT_URL, S3_REGION)
+    if STORAGE_BACKEND == "local":
+        return LocalStorage(UPLOADS_DIR)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND} (expected 'local' or 's3')")
+
+
+backend = _create_backend()
+
+
+def _lock_blob(db: Session, key: str):
+    """
+    Serialize everything that creates or drops a reference to blob `key` (store + row insert,
+    release's count + delete) on a transaction-scoped advisory lock, released at commit/rollback.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": key})
+
+
+def store(db: Session, upload, suffix: str = "") -> str:
+    """
+    Store a received upload (see uploads.ReceivedUpload) by content and return its key.
+    Identical content uploaded again is not written a second time.
+
+    Takes the blob's lock in `db`'s transaction: the caller must add the FileScan row
+    referencing the key and commit (or roll back) on the same session, so a concurrent
+    release() cannot delete the blob between this put and that insert.
+    """
+    key = blob_key(upload.sha256, suffix)
+    _lock_blob(db, key)
+    if not backend.put(key, upload.open()):
+        metrics.UPLOAD_DEDUPED_BYTES.inc(upload.size)
+    return key
+
+
+def release(db: Session, file_scan: models.FileScan):
+    """
+    Delete a FileScan row and, once no other row references the same blob, the blob itself.
+    References are counted by storage_path: the same bytes stored with another suffix are a
+    different blob. Commits.
+    """
+    key = file_scan.storage_path
+    _lock_blob(db, key)
+    db.delete(file_scan)
+    db.flush()
+
+    references = db.execute(
+        select(func.count()).select_from(models.FileScan).where(models.FileScan.storage_path == key)
+    ).scalar()
+    if references == 0:
+        # Still under the lock: a store() of the same content waits and then writes the blob again
+        try:
+            backend.delete(key)
+        except Exception as e:
+            # The row is gone either way; an orphaned blob is only wasted space
+            logger.warning(f"Failed to delete blob {key}: {e}")
+    db.commit()
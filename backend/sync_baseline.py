@@ -0,0 +1,85 @@
+"""Sync Baseline Routes (benchmark only)
+The async hot endpoints re-declared as sync handlers on the threadpool Session, for backend_benchmark.py
+
+Mounted under /api/bench/sync when the server runs with BENCHMARK_SYNC_ROUTES=true. The handlers only
+differ from server.py in how they reach the database; everything else comes from hot_endpoints.
+"""
+
+import os
+from typing import List
+
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.orm import Session
+
+import auth
+import http_cache
+import hot_endpoints
+import models
+import schemas
+from database import get_db
+from hot_endpoints import rows_response
+
+BENCHMARK_SYNC_ROUTES = os.getenv("BENCHMARK_SYNC_ROUTES", "false").lower() in ("1", "true", "yes")
+
+router = APIRouter(prefix="/api/bench/sync")
+
+
+@router.get("/auth/me", response_model=schemas.UserResponse)
+def get_me(current_user: models.User = Depends(auth.get_current_user)):
+    return current_user
+
+
+@router.post("/v1/log", response_model=schemas.HealthLogResponse)
+def log_health_data(
+    log_data: schemas.HealthLogCreate,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    new_log = hot_endpoints.new_health_log(current_user.id, log_data)
+    db.add(new_log)
+    db.commit()
+    db.refresh(new_log)
+    return new_log
+
+
+@router.get("/v1/logs", response_model=List[schemas.HealthLogResponse])
+def get_health_logs(
+    metric_type: str = None,
+    days: int = 7,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(auth.get_user_read_db)
+):
+    return rows_response(db.execute(hot_endpoints.health_logs_query(current_user.id, metric_type, days)).all())
+
+
+@router.post("/v1/chat", response_model=List[schemas.ChatResponse])
+def chat(
+    message_data: schemas.ChatMessage,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    user_message = hot_endpoints.user_chat_message(current_user.id, message_data.message)
+    db.add(user_message)
+    db.commit()
+    db.refresh(user_message)
+
+    ai_message = hot_endpoints.ai_chat_reply(current_user.id, message_data.message)
+    db.add(ai_message)
+    db.commit()
+    db.refresh(ai_message)
+    return [user_message, ai_message]
+
+
+@router.get("/v1/dashboard", response_model=schemas.DashboardData)
+def get_dashboard(
+    request: Request,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    recent_logs = db.execute(hot_endpoints.recent_logs_query(current_user.id)).scalars().all()
+    wearables = db.execute(hot_endpoints.active_wearables_query(current_user.id)).scalars().all()
+    insights = hot_endpoints.dashboard_insights(current_user.id, db)
+
+    content = hot_endpoints.dashboard_json(current_user, recent_logs, wearables, insights)
+    response = Response(content=content, media_type="application/json")
+    return http_cache.conditional_response(request, response)
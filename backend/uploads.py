@@ -0,0 +1,144 @@
+"""Upload Limits
+Request body size limits enforced while the body is received, and hashing of the parsed upload in place
+"""
+
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from typing import BinaryIO
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+
+import workers
+
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 64 * 1024))
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", 10 * 1024 * 1024))
+MAX_PDF_BYTES = int(os.getenv("MAX_PDF_BYTES", 20 * 1024 * 1024))
+# Bulk user CSV/JSON (roughly 200k users)
+MAX_PROVISION_BYTES = int(os.getenv("MAX_PROVISION_BYTES", 20 * 1024 * 1024))
+# Multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Request body limits per upload route (enforced by UploadSizeLimitMiddleware)
+UPLOAD_LIMITS = {
+    "/api/v1/scan/food": MAX_IMAGE_BYTES,
+    "/api/v1/scan/skin": MAX_IMAGE_BYTES,
+    "/api/v1/upload/pdf": MAX_PDF_BYTES,
+    "/api/admin/users/bulk": MAX_PROVISION_BYTES,
+}
+
+
+class ReceivedUpload:
+    """
+    A parsed upload with its size and SHA-256. `file` is the temp file Starlette already
+    spooled the multipart part into (memory, then disk); it is not copied again.
+    """
+
+    def __init__(self, file: BinaryIO, size: int, sha256: str):
+        self.file = file
+        self.size = size
+        self.sha256 = sha256
+
+    def open(self):
+        """Rewind and return the underlying binary file object."""
+        self.file.seek(0)
+        return self.file
+
+    def save(self, path: Path):
+        """Copy to `path` chunk by chunk."""
+        with open(path, "wb") as f:
+            shutil.copyfileobj(self.open(), f, UPLOAD_CHUNK_SIZE)
+
+    def close(self):
+        self.file.close()
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File too large (max {max_bytes // (1024 * 1024)}MB)")
+
+
+def _measure(file: BinaryIO):
+    """Size and SHA-256 of `file`, read in UPLOAD_CHUNK_SIZE chunks."""
+    file.seek(0)
+    hasher = hashlib.sha256()
+    size = 0
+    while chunk := file.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        hasher.update(chunk)
+    file.seek(0)
+    return size, hasher.hexdigest()
+
+
+async def receive_upload(file: UploadFile, max_bytes: int) -> ReceivedUpload:
+    """
+    Check the size of an upload and hash it (off the event loop: large parts are on disk).
+    The request body itself was already capped while it was received (UploadSizeLimitMiddleware);
+    this applies the exact per-file limit.
+
+    Raises:
+        HTTPException: 413 if the file is larger than `max_bytes`
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(max_bytes)
+    size, sha256 = await workers.run_io(_measure, file.file)
+    if size > max_bytes:
+        raise _too_large(max_bytes)
+    return ReceivedUpload(file.file, size, sha256)
+
+
+def _too_large_response(max_bytes: int) -> JSONResponse:
+    error = _too_large(max_bytes)
+    return JSONResponse(status_code=error.status_code, content={"detail": error.detail})
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware capping upload request bodies (UPLOAD_LIMITS) while they are received.
+    A declared Content-Length over the limit is refused before anything is read; otherwise
+    (including chunked requests without a length) the body stops being read and the request
+    gets a 413 as soon as the running byte count crosses the limit.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        max_bytes = UPLOAD_LIMITS.get(scope.get("path")) if scope["type"] == "http" and scope["method"] == "POST" else None
+        if max_bytes is None:
+            await self.app(scope, receive, send)
+            return
+
+        limit = max_bytes + MULTIPART_OVERHEAD
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > limit:
+            await _too_large_response(max_bytes)(scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Surfaces from the multipart parser as an HTTPException (413)
+                    raise _too_large(max_bytes)
+            return message
+
+        async def tracked_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except HTTPException as e:
+            if e.status_code != 413 or response_started:
+                raise
+            await _too_large_response(max_bytes)(scope, receive, send)
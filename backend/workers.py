@@ -0,0 +1,54 @@
+"""Background Worker Pools
+Bounded pools that keep blocking file I/O and image decoding/inference off the event loop
+"""
+
+import asyncio
+import contextvars
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Optional
+
+SCAN_IO_WORKERS = int(os.getenv("SCAN_IO_WORKERS", 8))
+# PIL releases the GIL while decoding/resizing, so threads scale across cores here
+# without copying images into another process
+SCAN_CPU_WORKERS = int(os.getenv("SCAN_CPU_WORKERS", os.cpu_count() or 2))
+
+io_pool = ThreadPoolExecutor(max_workers=SCAN_IO_WORKERS, thread_name_prefix="scan-io")
+cpu_pool = ThreadPoolExecutor(max_workers=SCAN_CPU_WORKERS, thread_name_prefix="scan-cpu")
+
+# Pure-Python CPU work that holds the GIL (e.g. bcrypt batches) goes to processes
+PROCESS_WORKERS = int(os.getenv("PROCESS_WORKERS", os.cpu_count() or 1))
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def process_pool() -> ProcessPoolExecutor:
+    """Shared process pool, started on first use."""
+    global _process_pool
+    if _process_pool is None:
+        # spawn: the web process has threads (DB pool, replica checks) that fork would copy mid-state
+        _process_pool = ProcessPoolExecutor(max_workers=PROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _process_pool
+
+
+async def run_io(fn, *args, **kwargs):
+    """Run blocking file/DB I/O in the bounded I/O pool."""
+    # Copy the context: the request's query stats and read-your-writes state follow the call
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(io_pool, partial(context.run, fn, *args, **kwargs))
+
+
+async def run_cpu(fn, *args, **kwargs):
+    """Run image decoding / model inference in the bounded CPU pool."""
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(cpu_pool, partial(context.run, fn, *args, **kwargs))
+
+
+def shutdown():
+    global _process_pool
+    io_pool.shutdown(wait=True)
+    cpu_pool.shutdown(wait=True)
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=True)
+        _process_pool = None
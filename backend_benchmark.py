@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for the Idunn Wellness API.
+Measures throughput and latency of the hot endpoints at several client concurrency levels.
+
+Usage:
+    python backend_benchmark.py endpoints [--base-url URL] [--concurrency 50 200 1000] [--duration 15] [--client-processes N] [--no-sync-baseline]
+    python backend_benchmark.py startup [--runs 10]
+    python backend_benchmark.py ids [--rows 1000000]   (needs DATABASE_URL)
+    python backend_benchmark.py serialize [--rows 100000]
+    python backend_benchmark.py scan-burst [--scans 32] [--image-size 4000]
+    python backend_benchmark.py inference [--requests 512] [--batch-sizes 1 4 16]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import requests
+
+# Configuration
+BASE_URL = "http://localhost:8001/api"
+BENCH_PASSWORD = "bench123456"
+BACKEND_DIR = Path(__file__).resolve().parent / "backend"
+# Sync (threadpool) copies of HOT_ENDPOINTS, mounted when the server runs with BENCHMARK_SYNC_ROUTES=true
+SYNC_BASELINE_PREFIX = "/bench/sync"
+
+HOT_ENDPOINTS = [
+    ("GET", "/auth/me", None),
+    ("GET", "/v1/logs", None),
+    ("POST", "/v1/log", {"data_source": "manual", "metric_type": "water_ml", "value": 250.0}),
+    ("GET", "/v1/dashboard", None),
+    ("POST", "/v1/chat", {"message": "How can I sleep better?"}),
+]
+
+
+def register_user(base_url: str) -> str:
+    """Register a throwaway user and return its bearer token."""
+    response = requests.post(f"{base_url}/auth/register", json={
+        "email": f"bench_{uuid.uuid4().hex[:12]}@example.com",
+        "password": BENCH_PASSWORD,
+    })
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _endpoint_clients(base_url: str, token: str, method: str, endpoint: str, body, clients: int, deadline: float):
+    """`clients` concurrent request loops on one event loop; returns (latencies, errors)."""
+    import asyncio
+
+    import httpx
+
+    latencies: List[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=base_url, headers={"Authorization": f"Bearer {token}"},
+                                 limits=limits, timeout=30) as client:
+        async def loop():
+            nonlocal errors
+            while time.time() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, endpoint, json=body)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(loop() for _ in range(clients)))
+    return latencies, errors
+
+
+def _endpoint_process(args) -> tuple:
+    import asyncio
+    return asyncio.run(_endpoint_clients(*args))
+
+
+def run_endpoint(base_url: str, token: str, method: str, endpoint: str, body, concurrency: int, duration: float,
+                 processes: int = 1) -> Dict:
+    """
+    Hammer one endpoint with `concurrency` async clients for `duration` seconds, spread over
+    `processes` client processes so the load generator is not the bottleneck.
+    """
+    processes = max(1, min(processes, concurrency))
+    shares = [concurrency // processes + (1 if i < concurrency % processes else 0) for i in range(processes)]
+    # Wall-clock deadline: shared by every client process
+    deadline = time.time() + duration
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        results = list(pool.map(_endpoint_process, [
+            (base_url, token, method, endpoint, body, clients, deadline) for clients in shares
+        ]))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for samples, _ in results for latency in samples]
+    errors = sum(failed for _, failed in results)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": (statistics.mean(latencies) * 1000) if latencies else 0.0,
+    }
+
+
+def bench_endpoints(args):
+    """Async handlers vs their sync baseline copies, same requests and client counts."""
+    token = register_user(args.base_url)
+    variants = [("async", "")]
+    if args.sync_baseline:
+        probe = requests.get(f"{args.base_url}{SYNC_BASELINE_PREFIX}/auth/me",
+                             headers={"Authorization": f"Bearer {token}"}, timeout=30)
+        if probe.status_code == 404:
+            print("⚠️  Sync baseline routes not mounted (start the server with BENCHMARK_SYNC_ROUTES=true); async only")
+        else:
+            variants.append(("sync", SYNC_BASELINE_PREFIX))
+
+    print(f"🚀 Benchmarking {args.base_url} ({args.duration:.0f}s per run)")
+    print("=" * 96)
+    print(f"{'endpoint':<22}{'handler':>8}{'clients':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>10}{'vs sync':>10}")
+    for method, endpoint, body in HOT_ENDPOINTS:
+        for concurrency in args.concurrency:
+            results = {}
+            for name, prefix in variants:
+                results[name] = run_endpoint(args.base_url, token, method, prefix + endpoint, body, concurrency,
+                                             args.duration, args.client_processes)
+            for name, result in results.items():
+                baseline = results.get("sync")
+                ratio = f"{result['rps'] / baseline['rps']:.2f}x" if baseline and baseline["rps"] else "-"
+                print(f"{method + ' ' + endpoint:<22}{name:>8}{concurrency:>8}{result['rps']:>10.1f}"
+                      f"{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['errors']:>10}{ratio:>10}")
+
+
+def bench_startup(args):
+    """Wall time of `import server` in a fresh interpreter (worker boot cost, no DB needed)."""
+    env = dict(os.environ, WARMUP_ON_STARTUP="false")
+    timings = []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import server"], cwd=BACKEND_DIR, env=env, check=True)
+        timings.append(time.perf_counter() - started)
+
+    print(f"🚀 import server: median {statistics.median(timings) * 1000:.0f} ms, "
+          f"min {min(timings) * 1000:.0f} ms, max {max(timings) * 1000:.0f} ms over {args.runs} runs")
+
+    # Slowest modules by cumulative import time
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import server"],
+                            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    print("\nSlowest imports (cumulative µs):")
+    for cumulative, module in sorted(rows, reverse=True)[:args.top]:
+        print(f"{cumulative:>10}  {module}")
+
+
+def bench_ids(args):
+    """Insert throughput and primary-key index size: uuid4 vs uuid7 on an append-only table."""
+    sys.path.insert(0, str(BACKEND_DIR))
+    from sqlalchemy import text
+    from database import engine
+    from models import uuid7
+
+    print(f"🚀 Inserting {args.rows} rows per id scheme (batches of {args.batch})")
+    print("=" * 60)
+    print(f"{'scheme':<8}{'rows/s':>12}{'index MB':>12}{'table MB':>12}")
+    for name, generate in (("uuid4", uuid.uuid4), ("uuid7", uuid7)):
+        table = f"bench_ids_{name}"
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP TABLE IF EXISTS {table}"))
+            connection.execute(text(f"CREATE TABLE {table} (id uuid PRIMARY KEY, value float8 NOT NULL)"))
+
+        started = time.perf_counter()
+        for offset in range(0, args.rows, args.batch):
+            rows = [{"id": generate(), "value": 1.0} for _ in range(min(args.batch, args.rows - offset))]
+            with engine.begin() as connection:
+                connection.execute(text(f"INSERT INTO {table} (id, value) VALUES (:id, :value)"), rows)
+        elapsed = time.perf_counter() - started
+
+        with engine.begin() as connection:
+            index_bytes = connection.execute(text(f"SELECT pg_relation_size('{table}_pkey')")).scalar()
+            table_bytes = connection.execute(text(f"SELECT pg_relation_size('{table}')")).scalar()
+            connection.execute(text(f"DROP TABLE {table}"))
+
+        print(f"{name:<8}{args.rows / elapsed:>12.0f}{index_bytes / 2**20:>12.1f}{table_bytes / 2**20:>12.1f}")
+
+
+def bench_serialize(args):
+    """Rows/second: ORM objects + Pydantic validation vs column tuples + orjson (list endpoints)."""
+    sys.path.insert(0, str(BACKEND_DIR))
+    from datetime import datetime
+    from types import SimpleNamespace
+    from typing import List as ListType
+
+    import orjson
+    from pydantic import TypeAdapter
+    import schemas
+
+    now = datetime.utcnow()
+    fields = ("id", "user_id", "data_source", "metric_type", "value", "timestamp")
+    user_id = uuid.uuid4()
+    rows = [(uuid.uuid4(), user_id, "manual", "water_ml", 250.0, now) for _ in range(args.rows)]
+    entities = [SimpleNamespace(**dict(zip(fields, row))) for row in rows]
+    adapter = TypeAdapter(ListType[schemas.HealthLogResponse])
+
+    def pydantic_path():
+        return adapter.dump_json(adapter.validate_python(entities, from_attributes=True))
+
+    def orjson_path():
+        return orjson.dumps([dict(zip(fields, row)) for row in rows])
+
+    print(f"🚀 Serializing {args.rows} health log rows")
+    print("=" * 50)
+    for name, path in (("pydantic from_attributes", pydantic_path), ("tuples + orjson", orjson_path)):
+        started = time.perf_counter()
+        path()
+        elapsed = time.perf_counter() - started
+        print(f"{name:<28}{args.rows / elapsed:>14,.0f} rows/s")
+
+
+def bench_scan_burst(args):
+    """/health latency on its own vs while a burst of large food scans is in flight."""
+    import io
+
+    from PIL import Image
+
+    token = register_user(args.base_url)
+    buffer = io.BytesIO()
+    Image.effect_noise((args.image_size, args.image_size), 64).convert("RGB").save(buffer, format="JPEG", quality=95)
+    image = buffer.getvalue()
+
+    def probe_health(stop: threading.Event) -> List[float]:
+        session = requests.Session()
+        latencies = []
+        while not stop.is_set():
+            started = time.perf_counter()
+            session.get(f"{args.base_url}/health", timeout=30)
+            latencies.append(time.perf_counter() - started)
+            time.sleep(0.01)
+        return latencies
+
+    def scan(_):
+        response = requests.post(f"{args.base_url}/v1/scan/food", headers={"Authorization": f"Bearer {token}"},
+                                 files={"file": ("burst.jpg", image, "image/jpeg")}, timeout=120)
+        return response.status_code
+
+    with ThreadPoolExecutor(max_workers=1) as prober:
+        stop = threading.Event()
+        pending = prober.submit(probe_health, stop)
+        time.sleep(args.idle)
+        stop.set()
+        idle = pending.result()
+
+    with ThreadPoolExecutor(max_workers=args.scans + 1) as pool:
+        stop = threading.Event()
+        pending = pool.submit(probe_health, stop)
+        started = time.perf_counter()
+        statuses = list(pool.map(scan, range(args.scans)))
+        burst_seconds = time.perf_counter() - started
+        stop.set()
+        busy = pending.result()
+
+    failed = sum(1 for status in statuses if status >= 400)
+    print(f"🚀 {args.scans} concurrent {len(image) / 2**20:.1f} MB scans in {burst_seconds:.1f}s ({failed} failed)")
+    print("=" * 50)
+    print(f"{'GET /health':<18}{'samples':>8}{'p50 ms':>12}{'p99 ms':>12}")
+    for name, samples in (("idle", idle), ("during burst", busy)):
+        print(f"{name:<18}{len(samples):>8}{percentile(samples, 50) * 1000:>12.1f}{percentile(samples, 99) * 1000:>12.1f}")
+
+
+def bench_inference(args):
+    """Micro-batching runner throughput and latency at several max batch sizes (no server needed)."""
+    sys.path.insert(0, str(BACKEND_DIR))
+    import asyncio
+
+    import numpy as np
+    import inference
+    from image_preprocessing import TARGET_SIZE, PreprocessedImage
+
+    image = PreprocessedImage(np.random.randint(0, 256, (TARGET_SIZE, TARGET_SIZE, 3), dtype=np.uint8), (3024, 4032))
+
+    async def run(max_batch: int) -> Dict:
+        runner = inference.InferenceRunner("food", max_batch=max_batch, max_wait_ms=args.max_wait_ms)
+        runner.start()
+        gate = asyncio.Semaphore(args.concurrency)
+        latencies: List[float] = []
+
+        async def request():
+            async with gate:
+                started = time.perf_counter()
+                await runner.submit(image)
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(request() for _ in range(args.requests)))
+        elapsed = time.perf_counter() - started
+        await runner.stop()
+        return {"rps": args.requests / elapsed, "p50_ms": percentile(latencies, 50) * 1000,
+                "p99_ms": percentile(latencies, 99) * 1000}
+
+    async def main():
+        inference.start(n_workers=args.workers)
+        try:
+            # Warm the worker processes (spawn + model load) outside the timings
+            await run(1)
+            for max_batch in args.batch_sizes:
+                result = await run(max_batch)
+                print(f"{max_batch:>10}{result['rps']:>12.1f}{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}")
+        finally:
+            await inference.stop()
+
+    print(f"🚀 {args.requests} inference requests, {args.concurrency} concurrent, {args.workers} workers, "
+          f"backend {inference.INFERENCE_BACKEND}")
+    print("=" * 42)
+    print(f"{'max batch':>10}{'img/s':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Idunn Wellness API benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    endpoints_parser = subparsers.add_parser("endpoints", help="Hot endpoint throughput under concurrent clients")
+    endpoints_parser.add_argument("--base-url", default=BASE_URL)
+    endpoints_parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200, 1000])
+    endpoints_parser.add_argument("--duration", type=float, default=15.0)
+    endpoints_parser.add_argument("--client-processes", type=int, default=os.cpu_count() or 1,
+                                  help="Load generator processes (async clients are split across them)")
+    endpoints_parser.add_argument("--no-sync-baseline", dest="sync_baseline", action="store_false",
+                                  help="Skip the sync threadpool baseline (BENCHMARK_SYNC_ROUTES) runs")
+    endpoints_parser.set_defaults(func=bench_endpoints)
+
+    startup_parser = subparsers.add_parser("startup", help="Import/boot time of server.py")
+    startup_parser.add_argument("--runs", type=int, default=10)
+    startup_parser.add_argument("--top", type=int, default=15)
+    startup_parser.set_defaults(func=bench_startup)
+
+    ids_parser = subparsers.add_parser("ids", help="uuid4 vs uuid7 insert throughput and index size")
+    ids_parser.add_argument("--rows", type=int, default=1_000_000)
+    ids_parser.add_argument("--batch", type=int, default=5000)
+    ids_parser.set_defaults(func=bench_ids)
+
+    serialize_parser = subparsers.add_parser("serialize", help="List endpoint serialization rows/second")
+    serialize_parser.add_argument("--rows", type=int, default=100_000)
+    serialize_parser.set_defaults(func=bench_serialize)
+
+    burst_parser = subparsers.add_parser("scan-burst", help="Other endpoints' latency during a burst of image scans")
+    burst_parser.add_argument("--base-url", default=BASE_URL)
+    burst_parser.add_argument("--scans", type=int, default=32)
+    burst_parser.add_argument("--image-size", type=int, default=4000)
+    burst_parser.add_argument("--idle", type=float, default=5.0)
+    burst_parser.set_defaults(func=bench_scan_burst)
+
+    inference_parser = subparsers.add_parser("inference", help="Micro-batched model inference throughput/latency")
+    inference_parser.add_argument("--requests", type=int, default=512)
+    inference_parser.add_argument("--concurrency", type=int, default=64)
+    inference_parser.add_argument("--workers", type=int, default=2)
+    inference_parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 16])
+    inference_parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    inference_parser.set_defaults(func=bench_inference)
+
+    args = parser.parse_args()
+    args.func(args)
@@ -0,0 +1,108 @@
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+# SQLite stand-in for Postgres; must be configured before the backend modules are imported
+_DB_DIR = tempfile.mkdtemp(prefix="idunn-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DB_DIR}/test.db")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+os.environ.setdefault("JWT_ALGORITHM", "HS256")
+os.environ.setdefault("UPLOADS_DIR", f"{_DB_DIR}/uploads")
+os.environ.setdefault("WARMUP_ON_STARTUP", "false")
+os.environ.setdefault("BENCHMARK_SYNC_ROUTES", "true")
+
+# Backend modules import each other as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from sqlalchemy import BigInteger  # noqa: E402
+from sqlalchemy.dialects.postgresql import JSONB  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+from sqlalchemy.ext.compiler import compiles  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+import database  # noqa: E402
+import models  # noqa: E402
+import query_stats  # noqa: E402
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    return "JSON"
+
+
+@compiles(BigInteger, "sqlite")
+def _bigint_on_sqlite(type_, compiler, **kw):
+    # Only INTEGER PRIMARY KEY auto-increments in SQLite
+    return "INTEGER"
+
+
+models.Base.metadata.create_all(database.engine)
+
+# Each async test (and each TestClient) runs its own event loop: pooled aiosqlite connections
+# would outlive their loop and their non-daemon threads would keep pytest from exiting
+database.AsyncSessionLocal.configure(bind=create_async_engine(database.ASYNC_DATABASE_URL, poolclass=NullPool))
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db():
+    """Session on the test database; every table is emptied afterwards."""
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        with database.engine.begin() as connection:
+            for table in reversed(models.Base.metadata.sorted_tables):
+                connection.execute(table.delete())
+
+
+@pytest.fixture
+def user(db):
+    user = models.User(email="user@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def auth_headers(user):
+    import auth
+    return {"Authorization": f"Bearer {auth.create_access_token({'sub': str(user.id)})}"}
+
+
+@pytest.fixture
+def client(db):
+    """TestClient without the lifespan (no background workers); tables are emptied afterwards via `db`."""
+    from fastapi.testclient import TestClient
+    import server
+    return TestClient(server.app)
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Assert that a block (e.g. one request through a TestClient) stays within a query budget.
+
+        with query_budget(3):
+            client.get("/api/v1/products")
+    """
+    @contextmanager
+    def budget(max_queries: int, allow_n_plus_one: bool = False):
+        with query_stats.capture_all() as stats:
+            yield stats
+        assert stats.count <= max_queries, (
+            f"Query budget exceeded: {stats.count} queries (budget {max_queries})"
+        )
+        if not allow_n_plus_one:
+            assert not stats.repeated(), f"Repeated statements (N+1): {stats.repeated()}"
+
+    return budget
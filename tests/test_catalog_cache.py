@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+import catalog_cache
+import models
+from catalog_cache import CatalogCache, bump_catalog_version
+from database import SessionLocal
+
+
+class FlakySessions:
+    """Session factory whose sessions fail while `failing` is set."""
+
+    def __init__(self):
+        self.failing = False
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.failing:
+            raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+        return SessionLocal()
+
+
+def _add_product(db, name):
+    db.add(models.Product(sku=name.upper(), name=name, category="supplements", price=10.0, partner_url="https://partner.example"))
+    bump_catalog_version(db)
+    db.commit()
+
+
+def test_db_error_serves_stale_snapshot_and_backs_off(db, monkeypatch):
+    _add_product(db, "Magnesium")
+    sessions = FlakySessions()
+    cache = CatalogCache(sessions)
+    clock = [1000.0]
+    monkeypatch.setattr(catalog_cache.time, "monotonic", lambda: clock[0])
+
+    snapshot = cache.get()
+    assert [product['name'] for product in snapshot.products] == ["Magnesium"]
+
+    sessions.failing = True
+    clock[0] += catalog_cache.CATALOG_POLL_SECONDS
+    assert cache.get() is snapshot
+    calls = sessions.calls
+
+    # Still backing off: no new attempt
+    clock[0] += catalog_cache.CATALOG_POLL_SECONDS
+    assert cache.get() is snapshot
+    assert sessions.calls == calls
+
+    sessions.failing = False
+    _add_product(db, "Zinc")
+    clock[0] += catalog_cache.CATALOG_MAX_BACKOFF_SECONDS
+    assert sorted(product['name'] for product in cache.get().products) == ["Magnesium", "Zinc"]
+
+
+def test_db_error_without_snapshot_propagates(db):
+    sessions = FlakySessions()
+    sessions.failing = True
+
+    with pytest.raises(OperationalError):
+        CatalogCache(sessions).get()
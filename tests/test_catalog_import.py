@@ -0,0 +1,14 @@
+from catalog_import import normalize_row
+
+ROW = {'sku': 'MAG-1', 'name': 'Magnesium', 'category': 'Supplements', 'price': '12.50',
+       'partner_url': 'https://partner.example/mag'}
+
+
+def test_row_without_is_vetted_is_not_vetted():
+    assert normalize_row(ROW)['is_vetted'] == 0
+
+
+def test_is_vetted_flag():
+    assert normalize_row({**ROW, 'is_vetted': 'yes'})['is_vetted'] == 1
+    assert normalize_row({**ROW, 'is_vetted': True})['is_vetted'] == 1
+    assert normalize_row({**ROW, 'is_vetted': ''})['is_vetted'] == 0
@@ -0,0 +1,42 @@
+import uuid
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+import auth
+import models
+from click_tracker import ClickTracker, clicks_by_product
+
+
+def test_flushed_clicks_keep_the_user(db, user):
+    tracker = ClickTracker()
+    product_id = uuid.uuid4()
+    tracker.record(product_id, user.id)
+    tracker.record(product_id)
+
+    assert tracker.flush() == 2
+    assert {click.user_id for click in db.query(models.ProductClick)} == {user.id, None}
+    assert tracker.stats() == {'pending': 0, 'flushed': 2, 'dropped': 0}
+
+
+def test_optional_user_id_from_token(user):
+    token = auth.create_access_token({'sub': str(user.id)})
+
+    assert auth.get_optional_user_id(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)) == user.id
+    assert auth.get_optional_user_id(HTTPAuthorizationCredentials(scheme="Bearer", credentials="garbage")) is None
+    assert auth.get_optional_user_id(None) is None
+
+
+def test_admin_clicks_counts_every_worker(client, db, monkeypatch):
+    monkeypatch.setattr(auth, "ADMIN_API_KEY", "admin-key")
+    product_id = uuid.uuid4()
+    # Clicks flushed by two different worker processes
+    for tracker, clicks in ((ClickTracker(), 2), (ClickTracker(), 3)):
+        for _ in range(clicks):
+            tracker.record(product_id)
+        tracker.flush()
+
+    response = client.get("/api/admin/clicks", headers={"X-Admin-Key": "admin-key"})
+
+    assert response.status_code == 200
+    assert response.json()['clicks_by_product'] == {str(product_id): 5}
+    assert clicks_by_product(db) == {str(product_id): 5}
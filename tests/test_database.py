@@ -0,0 +1,112 @@
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import database
+import models
+
+
+@pytest.mark.anyio
+async def test_async_pool_counts_checkouts_and_timeouts():
+    engine = create_async_engine(database.ASYNC_DATABASE_URL, poolclass=database.InstrumentedAsyncQueuePool,
+                                 pool_size=1, max_overflow=0, pool_timeout=0.05)
+    try:
+        async with engine.connect() as held:
+            await held.execute(text("SELECT 1"))
+            with pytest.raises(PoolTimeoutError):
+                async with engine.connect():
+                    pass
+        stats = database.get_pool_stats(engine.pool)
+    finally:
+        await engine.dispose()
+
+    # The timed-out attempt is a failure, not a (slow) checkout
+    assert stats["checkouts"] == 1
+    assert stats["checkout_failures"] == 1
+    assert stats["wait_seconds_max"] < 0.05
+
+
+def test_sync_pool_stats_survive_dispose():
+    with database.engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    checkouts = database.get_pool_stats()["checkouts"]
+    database.engine.dispose()
+
+    assert checkouts >= 1
+    assert database.get_pool_stats()["checkouts"] == checkouts
+
+
+# ============ REPLICA ROUTING ============
+
+@pytest.fixture
+def router(monkeypatch):
+    router = database.ReplicaRouter([database.DATABASE_URL, database.DATABASE_URL])
+    # Health is set by the tests, not the background checker
+    monkeypatch.setattr(router, "_ensure_health_checks", lambda: None)
+    return router
+
+
+@pytest.fixture
+def request_state():
+    state = {"marker": None, "written": None}
+    token = database._request_writes.set(state)
+    yield state
+    database._request_writes.reset(token)
+
+
+def test_reads_round_robin_over_healthy_replicas(router, request_state):
+    router.replicas[0].healthy = False
+
+    assert router.pick("user-1") is router.replicas[1]
+    assert router.pick("user-1") is router.replicas[1]
+
+
+def test_falls_back_to_primary_when_no_replica_is_healthy(router, request_state):
+    for replica in router.replicas:
+        replica.healthy = False
+
+    assert router.pick("user-1") is None
+
+
+def test_recent_write_marker_pins_reads_to_primary(router, request_state):
+    request_state["marker"] = database.sign_write_marker("user-1", time.time())
+
+    assert router.pick("user-1") is None
+    # The marker only pins its own user
+    assert router.pick("user-2") is not None
+
+
+def test_pinning_expires_after_the_window(router, request_state):
+    request_state["marker"] = database.sign_write_marker("user-1", time.time() - database.READ_YOUR_WRITES_SECONDS - 1)
+
+    assert router.pick("user-1") is not None
+
+
+def test_tampered_marker_is_ignored(router, request_state):
+    user_key, written_at, _ = database.sign_write_marker("user-1", time.time()).rsplit(":", 2)
+    request_state["marker"] = f"{user_key}:{written_at}:{'0' * 64}"
+
+    assert router.pick("user-1") is not None
+
+
+def test_commit_with_writes_records_the_user(db, user, request_state):
+    db.info["user_key"] = str(user.id)
+    db.add(models.HealthLog(user_id=user.id, data_source="manual", metric_type="water_ml", value=250.0))
+    db.commit()
+
+    assert request_state["written"][0] == str(user.id)
+
+
+def test_write_response_carries_a_marker_for_other_workers(client, auth_headers, user):
+    response = client.post("/api/v1/log", headers=auth_headers,
+                           json={"data_source": "manual", "metric_type": "water_ml", "value": 250.0})
+    marker = response.headers[database.READ_YOUR_WRITES_HEADER]
+
+    assert database.verify_write_marker(marker)[0] == str(user.id)
+    assert response.cookies[database.READ_YOUR_WRITES_COOKIE] == marker
+
+    reads = client.get("/api/v1/logs", headers=auth_headers)
+    assert database.READ_YOUR_WRITES_HEADER not in reads.headers
@@ -0,0 +1,21 @@
+import io
+
+import pytest
+from PIL import Image
+
+from food_recognition import food_ai
+
+
+def test_invalid_image_is_rejected():
+    with pytest.raises(ValueError):
+        food_ai.recognize_food(b"not an image")
+
+
+def test_recognize_food():
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), (200, 120, 40)).save(buffer, format="JPEG")
+
+    foods = food_ai.recognize_food(buffer.getvalue())
+
+    assert 2 <= len(foods) <= 3
+    assert all({'item', 'qty_g', 'calories'} <= food.keys() for food in foods)
@@ -0,0 +1,32 @@
+import pytest
+
+# Async hot endpoints and their sync benchmark baseline must do the same work
+PREFIXES = ["/api", "/api/bench/sync"]
+
+
+@pytest.mark.parametrize("prefix", PREFIXES)
+def test_log_rejects_unknown_metric(client, auth_headers, prefix):
+    response = client.post(f"{prefix}/v1/log", headers=auth_headers,
+                           json={"data_source": "manual", "metric_type": "mood", "value": 1.0})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("prefix", PREFIXES)
+def test_logs_filter_by_metric_type(client, auth_headers, prefix):
+    for metric_type, value in (("water_ml", 250.0), ("steps", 4000.0)):
+        response = client.post(f"{prefix}/v1/log", headers=auth_headers,
+                               json={"data_source": "manual", "metric_type": metric_type, "value": value})
+        assert response.status_code == 200
+
+    logs = client.get(f"{prefix}/v1/logs", params={"metric_type": "steps"}, headers=auth_headers).json()
+    assert [log["metric_type"] for log in logs] == ["steps"]
+
+
+@pytest.mark.parametrize("prefix", PREFIXES)
+def test_dashboard_and_chat(client, auth_headers, prefix):
+    dashboard = client.get(f"{prefix}/v1/dashboard", headers=auth_headers)
+    assert dashboard.status_code == 200
+    assert set(dashboard.json()["insights"]) == {"sleep", "hydration"}
+
+    messages = client.post(f"{prefix}/v1/chat", headers=auth_headers, json={"message": "How can I sleep better?"}).json()
+    assert [message["sender"] for message in messages] == ["user", "ai"]
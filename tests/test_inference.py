@@ -0,0 +1,77 @@
+import asyncio
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import image_preprocessing
+import inference
+
+
+def _image():
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 48), (255, 128, 0)).save(buffer, format="PNG")
+    return image_preprocessing.preprocess(buffer.getvalue(), target_size=32)
+
+
+def test_preprocess_keeps_uint8_pixels_until_the_worker():
+    image = _image()
+
+    assert image.pixels.dtype == np.uint8
+    normalized = image.normalized()
+    assert normalized.dtype == np.float32
+    assert normalized.max() == pytest.approx(1.0)
+
+
+@pytest.mark.anyio
+async def test_runners_share_one_in_flight_limit(monkeypatch):
+    running = 0
+    peak = 0
+
+    async def slow_batch(fn, task, images):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        return [{"task": task}] * len(images)
+
+    monkeypatch.setattr(inference.workers, "run_cpu", slow_batch)
+    inference.start(n_workers=0)
+    try:
+        image = _image()
+        results = await asyncio.gather(*(
+            runner.submit(image) for runner in (inference.food_runner, inference.skin_runner) for _ in range(3)
+        ))
+    finally:
+        await inference.stop()
+
+    assert [result["task"] for result in results] == ["food"] * 3 + ["skin"] * 3
+    assert peak == 1
+
+
+@pytest.mark.anyio
+async def test_stop_fails_queued_requests(monkeypatch):
+    release = asyncio.Event()
+
+    async def blocked_batch(fn, task, images):
+        await release.wait()
+        return [{}] * len(images)
+
+    monkeypatch.setattr(inference.workers, "run_cpu", blocked_batch)
+    inference.start(n_workers=0)
+    image = _image()
+    first = asyncio.create_task(inference.recognize_food(image))
+    await asyncio.sleep(0.05)  # first batch holds the only slot
+    queued = asyncio.create_task(inference.recognize_food(image))
+    await asyncio.sleep(0.05)
+
+    stopping = asyncio.create_task(inference.stop())
+    await asyncio.sleep(0)
+    release.set()
+    await stopping
+
+    assert await first == {}
+    with pytest.raises(RuntimeError):
+        await queued
@@ -0,0 +1,56 @@
+from datetime import datetime
+
+import pytest
+
+import meal_logging
+import models
+from nutrition_db import nutrition_db
+
+
+@pytest.fixture
+def scan(db, user):
+    scan = models.FileScan(user_id=user.id, file_type='food_scan', storage_path='ab/cd/abcd.jpg')
+    db.add(scan)
+    db.commit()
+    return scan
+
+
+def _daily(db, user):
+    return db.query(models.DailyNutrition).filter(models.DailyNutrition.user_id == user.id).one()
+
+
+def test_totals_are_computed_server_side(db, user, scan):
+    rice = nutrition_db.id_for_name('rice')
+    meal = meal_logging.log_meal(db, user.id, [{'food_id': rice, 'qty_g': 200, 'calories': 1}], scan_id=scan.id)
+
+    assert meal['items_logged'] == 1
+    assert meal['calories'] == pytest.approx(260.0)
+    assert meal['carbs_g'] == pytest.approx(56.0)
+
+
+def test_daily_totals_accumulate_across_meals(db, user):
+    eaten_at = datetime(2026, 10, 19, 12, 0)
+    meal_logging.log_meal(db, user.id, [{'item': 'banana', 'qty_g': 100}], eaten_at=eaten_at)
+    meal_logging.log_meal(db, user.id, [{'item': 'Apple', 'qty_g': 100}], eaten_at=eaten_at)
+
+    daily = _daily(db, user)
+    assert daily.meal_count == 2
+    assert daily.calories == pytest.approx(89 + 52)
+
+
+def test_repeated_confirm_logs_the_meal_once(db, user, scan):
+    items = [{'item': 'salmon', 'qty_g': 150}]
+    first = meal_logging.log_meal(db, user.id, items, scan_id=scan.id)
+    retry = meal_logging.log_meal(db, user.id, items, scan_id=scan.id)
+
+    assert retry == first
+    assert db.query(models.Meal).count() == 1
+    assert db.query(models.MealItem).count() == 1
+    daily = _daily(db, user)
+    assert daily.meal_count == 1
+    assert daily.calories == pytest.approx(first['calories'])
+
+
+def test_unknown_items_are_rejected(db, user):
+    with pytest.raises(ValueError, match="dragonfruit"):
+        meal_logging.log_meal(db, user.id, [{'item': 'dragonfruit', 'qty_g': 100}])
@@ -0,0 +1,35 @@
+import time
+import uuid
+
+import models
+
+
+def test_uuid7_version_and_variant():
+    value = models.uuid7()
+
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+
+
+def test_uuid7_embeds_the_current_millisecond():
+    before = time.time_ns() // 1_000_000
+    value = models.uuid7()
+    after = time.time_ns() // 1_000_000
+
+    assert before <= value.int >> 80 <= after
+
+
+def test_uuid7_sorts_by_creation_time():
+    ids = []
+    for _ in range(5):
+        ids.append(models.uuid7())
+        time.sleep(0.002)
+
+    assert sorted(ids) == ids
+    assert sorted(str(value) for value in ids) == [str(value) for value in ids]
+
+
+def test_append_tables_use_uuid7():
+    for model in (models.HealthLog, models.ChatHistory, models.FileScan):
+        # Column defaults are wrapped to take the execution context
+        assert model.__table__.c.id.default.arg(None).version == 7
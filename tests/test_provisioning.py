@@ -0,0 +1,75 @@
+import pytest
+
+import auth
+import models
+import provisioning
+import uploads
+import workers
+
+ADMIN = {"X-Admin-Key": "admin-key"}
+
+
+@pytest.fixture(autouse=True)
+def fast_admin(monkeypatch):
+    monkeypatch.setattr(auth, "ADMIN_API_KEY", "admin-key")
+    monkeypatch.setattr(workers, "PROCESS_WORKERS", 1)
+    monkeypatch.setattr(auth, "get_password_hash", lambda password: f"hashed:{password}")
+
+
+def _csv(*rows):
+    return "email,password,first_name,last_name\n" + "".join(f"{row}\n" for row in rows)
+
+
+def test_bulk_csv_is_streamed_in_batches(client, db, user, monkeypatch):
+    monkeypatch.setattr(provisioning, "BATCH_SIZE", 2)
+    payload = _csv(
+        "a@corp.example,password1,Ada,L",
+        "B@corp.example,password2,Bo,M",
+        "b@CORP.example,password3,Bo,M",      # same email, other case
+        "User@example.com,password4,Ex,Isting",  # existing account
+        "c@corp.example,password5,Cy,N",
+    )
+
+    response = client.post("/api/admin/users/bulk", headers=ADMIN,
+                           files={"file": ("users.csv", payload.encode(), "text/csv")})
+
+    assert response.status_code == 200
+    summary = response.json()
+    assert (summary['received'], summary['created'], summary['skipped']) == (5, 3, 2)
+    assert summary['users_per_second'] == pytest.approx(3 / summary['total_seconds'], rel=0.1)
+    emails = {email for (email,) in db.query(models.User.email)}
+    assert emails == {"user@example.com", "a@corp.example", "b@corp.example", "c@corp.example"}
+    assert db.query(models.UserProfile).count() == 3
+
+
+def test_invalid_row_rejects_the_whole_file(client, db, monkeypatch):
+    monkeypatch.setattr(provisioning, "BATCH_SIZE", 1)
+    payload = _csv("a@corp.example,password1,Ada,L", "not-an-email,password2,Bo,M")
+
+    response = client.post("/api/admin/users/bulk", headers=ADMIN,
+                           files={"file": ("users.csv", payload.encode(), "text/csv")})
+
+    assert response.status_code == 400
+    assert "row 2" in response.json()['detail']
+    assert db.query(models.User).count() == 0
+
+
+def test_bulk_json(client, db):
+    payload = b'[{"email": "j@corp.example", "password": "password1"}]'
+
+    response = client.post("/api/admin/users/bulk", headers=ADMIN,
+                           files={"file": ("users.json", payload, "application/json")})
+
+    assert response.status_code == 200
+    assert response.json()['created'] == 1
+
+
+def test_oversized_upload_is_refused(client, db, monkeypatch):
+    monkeypatch.setitem(uploads.UPLOAD_LIMITS, "/api/admin/users/bulk", 1024)
+    payload = _csv(*(f"u{i}@corp.example,password{i},U,{i}" for i in range(5000)))
+
+    response = client.post("/api/admin/users/bulk", headers=ADMIN,
+                           files={"file": ("users.csv", payload.encode(), "text/csv")})
+
+    assert response.status_code == 413
+    assert db.query(models.User).count() == 0
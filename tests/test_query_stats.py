@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+import database
+import models
+import query_stats
+import workers
+
+
+@pytest.fixture
+def history(db, user):
+    for metric_type, value in (("water_ml", 250.0), ("sleep_hours", 7.5), ("steps", 8000.0)) * 5:
+        db.add(models.HealthLog(user_id=user.id, data_source="manual", metric_type=metric_type, value=value))
+    for wearable_type in ("oura", "garmin", "whoop"):
+        db.add(models.WearableConnection(user_id=user.id, wearable_type=wearable_type))
+    for sender in ("user", "ai") * 5:
+        db.add(models.ChatHistory(user_id=user.id, sender=sender, message_text="hi"))
+    db.commit()
+
+
+# Budgets for a user with a week of history; rows are loaded in bulk, never one query per row
+def test_dashboard_query_budget(client, auth_headers, history, query_budget):
+    # user + logs + wearables, then the rules engine runs once per insight (logs x2, wearables,
+    # product recommendations for the triggered rules)
+    with query_budget(13):
+        response = client.get("/api/v1/dashboard", headers=auth_headers)
+    assert len(response.json()["recent_logs"]) == 15
+
+
+def test_logs_query_budget(client, auth_headers, history, query_budget):
+    with query_budget(2):
+        response = client.get("/api/v1/logs", headers=auth_headers)
+    assert len(response.json()) == 15
+
+
+def test_chat_history_query_budget(client, auth_headers, history, query_budget):
+    with query_budget(2):
+        response = client.get("/api/v1/chat/history", headers=auth_headers)
+    assert len(response.json()) == 10
+
+
+def test_failed_statement_does_not_leak_start_times():
+    with database.engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM no_such_table"))
+        connection.execute(text("SELECT 1"))
+        assert connection.info.get("query_started_at") == []
+
+
+def test_run_io_queries_count_towards_the_request():
+    def query():
+        with database.engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    async def request():
+        with query_stats.capture() as stats:
+            await workers.run_io(query)
+        return stats
+
+    assert asyncio.run(request()).count == 1
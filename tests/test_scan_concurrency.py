@@ -0,0 +1,83 @@
+import asyncio
+import io
+import time
+
+import httpx
+import pytest
+from PIL import Image
+
+import image_preprocessing
+import inference
+import models
+import server
+
+SCANS = 8
+# Each scan's decode is slowed to this; run on the event loop it would stall every other request as long
+DECODE_SECONDS = 0.5
+MAX_LOOP_LAG_SECONDS = 0.25
+MAX_PROBE_SECONDS = 0.5
+
+
+@pytest.fixture(scope="module")
+def jpeg():
+    buffer = io.BytesIO()
+    Image.effect_noise((1024, 1024), 64).convert("RGB").save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def slow_decode(monkeypatch):
+    preprocess = image_preprocessing.preprocess
+
+    def slow_preprocess(image_data):
+        time.sleep(DECODE_SECONDS)
+        return preprocess(image_data)
+
+    monkeypatch.setattr(image_preprocessing, "preprocess", slow_preprocess)
+
+
+async def _loop_lag(stop: asyncio.Event) -> float:
+    """Worst overshoot of a 10 ms sleep while the scans run."""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - started - 0.01)
+    return worst
+
+
+@pytest.mark.anyio
+async def test_event_loop_stays_responsive_during_scan_burst(db, auth_headers, jpeg, slow_decode):
+    """Concurrent scans must not stall other requests: decoding and inference run off the loop."""
+    inference.start(n_workers=0)
+    transport = httpx.ASGITransport(app=server.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=auth_headers,
+                                     timeout=120) as client:
+            async def scan():
+                return await client.post("/api/v1/scan/food", files={"file": ("burst.jpg", jpeg, "image/jpeg")})
+
+            async def probe():
+                started = time.perf_counter()
+                response = await client.get("/api/health")
+                return response.status_code, time.perf_counter() - started
+
+            stop = asyncio.Event()
+            lag = asyncio.create_task(_loop_lag(stop))
+            scans = [asyncio.create_task(scan()) for _ in range(SCANS)]
+            probes = []
+            while not all(task.done() for task in scans):
+                probes.append(await probe())
+                await asyncio.sleep(0.02)
+            stop.set()
+            responses = await asyncio.gather(*scans)
+            worst_lag = await lag
+    finally:
+        await inference.stop()
+
+    assert [response.status_code for response in responses] == [200] * SCANS
+    assert all(response.json()["detected_foods"] for response in responses)
+    assert db.query(models.FileScan).filter_by(file_type='food_scan').count() == SCANS
+    assert probes and all(status == 200 for status, _ in probes)
+    assert max(seconds for _, seconds in probes) < MAX_PROBE_SECONDS
+    assert worst_lag < MAX_LOOP_LAG_SECONDS
@@ -0,0 +1,44 @@
+import hashlib
+import io
+
+import models
+import storage
+import uploads
+
+
+def _upload(data: bytes) -> uploads.ReceivedUpload:
+    return uploads.ReceivedUpload(io.BytesIO(data), len(data), hashlib.sha256(data).hexdigest())
+
+
+def _scan(db, user, data: bytes, suffix: str) -> models.FileScan:
+    upload = _upload(data)
+    file_scan = models.FileScan(user_id=user.id, file_type='blood_pdf', content_hash=upload.sha256,
+                                storage_path=storage.store(db, upload, suffix))
+    db.add(file_scan)
+    db.commit()
+    return file_scan
+
+
+def test_identical_content_is_stored_once(db, user):
+    first = _scan(db, user, b"same bytes", ".jpg")
+    second = _scan(db, user, b"same bytes", ".jpg")
+
+    assert first.storage_path == second.storage_path
+    storage.release(db, first)
+    assert storage.backend.path(second.storage_path).exists()
+
+    storage.release(db, second)
+    assert not storage.backend.path(second.storage_path).exists()
+
+
+def test_references_are_counted_per_suffix(db, user):
+    # Same bytes, different suffix: two blobs, each with its own reference count
+    image = _scan(db, user, b"shared content", ".jpg")
+    pdf = _scan(db, user, b"shared content", ".pdf")
+
+    storage.release(db, image)
+    assert not storage.backend.path(image.storage_path).exists()
+    assert storage.backend.path(pdf.storage_path).exists()
+
+    storage.release(db, pdf)
+    assert not storage.backend.path(pdf.storage_path).exists()
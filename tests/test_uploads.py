@@ -0,0 +1,62 @@
+import asyncio
+import hashlib
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+import uploads
+
+LIMIT = 1024
+MULTIPART_HEADER = b'--x\r\nContent-Disposition: form-data; name="file"; filename="big.pdf"\r\n\r\n'
+
+
+@pytest.fixture
+def small_pdf_limit(monkeypatch):
+    monkeypatch.setitem(uploads.UPLOAD_LIMITS, "/api/v1/upload/pdf", LIMIT)
+
+
+def _multipart_chunks(total: int, chunk_size: int = 16 * 1024):
+    yield MULTIPART_HEADER
+    for _ in range(total // chunk_size):
+        yield b"0" * chunk_size
+    yield b"\r\n--x--\r\n"
+
+
+def test_chunked_body_over_limit_is_rejected(client, small_pdf_limit):
+    # A generator body is sent with Transfer-Encoding: chunked (no Content-Length)
+    response = client.post("/api/v1/upload/pdf", content=_multipart_chunks(uploads.MULTIPART_OVERHEAD * 2),
+                           headers={"Content-Type": "multipart/form-data; boundary=x"})
+
+    assert response.status_code == 413
+
+
+def test_declared_length_over_limit_is_rejected_before_reading(client, small_pdf_limit):
+    response = client.post("/api/v1/upload/pdf", files={"file": ("big.pdf", b"0" * (uploads.MULTIPART_OVERHEAD * 2))})
+
+    assert response.status_code == 413
+
+
+def test_other_routes_are_not_limited(client, small_pdf_limit):
+    response = client.post("/api/auth/login", json={"email": "nobody@example.com", "password": "x" * (LIMIT * 100)})
+
+    assert response.status_code == 401
+
+
+def test_receive_upload_hashes_without_copying():
+    data = b"%PDF-1.4 test"
+    file = io.BytesIO(data)
+    upload = asyncio.run(uploads.receive_upload(UploadFile(file, size=len(data), filename="a.pdf"), LIMIT))
+
+    assert upload.file is file
+    assert upload.size == len(data)
+    assert upload.sha256 == hashlib.sha256(data).hexdigest()
+    assert upload.open().read() == data
+
+
+def test_receive_upload_rejects_large_file():
+    data = b"0" * (LIMIT + 1)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(uploads.receive_upload(UploadFile(io.BytesIO(data), filename="a.pdf"), LIMIT))
+
+    assert error.value.status_code == 413